@@ -126,6 +126,7 @@ class Player():
         self.berserk_glyph = berserk_glyph
         self.mangle_glyph = mangle_glyph
         self.rip_duration = 12 + 4 * rip_glyph + 4 * t7_2p
+        self.rip_num_ticks = self.rip_duration // 2
         self.shred_glyph = shred_glyph
         self.lacerate_multi = 1 + 0.05 * t7_2p
 
@@ -167,6 +168,16 @@ class Player():
         self.proc_trinkets = proc_trinkets
         self.set_mana_regen()
         self.log = log
+        self._damage_param_cache = collections.OrderedDict()
+
+        # Crit multipliers depend only on the meta gem and talents, so they
+        # are computed once for each form, indexed by cat_form.
+        bear_crit_multiplier = 2.0 * (1.0 + self.meta * 0.03)
+        self._crit_multipliers = (
+            bear_crit_multiplier,
+            bear_crit_multiplier
+            * (1.0 + round(self.predatory_instincts / 30, 2))
+        )
         self.reset()
 
     def calc_miss_chance(self):
@@ -182,10 +193,13 @@ class Player():
         self.dodge_chance = 0.01 * (6.5 - dodge_reduction)
 
     def calc_crit_multiplier(self):
-        crit_multiplier = 2.0 * (1.0 + self.meta * 0.03)
-        if self.cat_form:
-            crit_multiplier *= (1.0 + round(self.predatory_instincts / 30, 2))
-        return crit_multiplier
+        """Look up the critical strike damage multiplier for the current
+        form.
+
+        Returns:
+            crit_multiplier (float): Damage multiplier on crits.
+        """
+        return self._crit_multipliers[self.cat_form]
 
     def set_mana_regen(self):
         """Calculate and store mana regeneration rates based on specified regen
@@ -214,7 +228,62 @@ class Player():
             blood_frenzy, shattering_throw, tigers_fury=False
     ):
         """Calculate high and low end damage of all abilities as a function of
-        specified boss debuffs."""
+        specified boss debuffs. Results are memoized on the debuff state and
+        the current values of all player stats that enter the calculation,
+        since the same handful of configurations recur throughout a fight as
+        debuffs, Tiger's Fury, and trinket procs come and go. The memo is
+        kept as a least recently used cache, so that stat weight runs and
+        other stat changes cannot grow it without bound."""
+        key = (
+            gift_of_arthas, boss_armor, sunder, faerie_fire, blood_frenzy,
+            shattering_throw, tigers_fury
+        ) + tuple(getattr(self, stat) for stat in self._damage_stats)
+        cached_values = self._damage_param_cache.get(key)
+
+        if cached_values is None:
+            self._calc_damage_params(
+                gift_of_arthas, boss_armor, sunder, faerie_fire,
+                blood_frenzy, shattering_throw, tigers_fury
+            )
+            cached_values = tuple(
+                getattr(self, attr) for attr in self._damage_attrs
+            )
+            self._damage_param_cache[key] = cached_values
+
+            if len(self._damage_param_cache) > self._damage_param_cache_size:
+                self._damage_param_cache.popitem(last=False)
+        else:
+            self._damage_param_cache.move_to_end(key)
+
+            for attr, value in zip(self._damage_attrs, cached_values):
+                setattr(self, attr, value)
+
+    # Maximum number of damage parameter configurations kept in the memo
+    _damage_param_cache_size = 256
+
+    # Player attributes read by the damage calculation, which together with
+    # the debuff state fully determine its output
+    _damage_stats = (
+        'attack_power', 'debuff_ap', 'bonus_damage', 'armor_pen_rating',
+        'damage_multiplier', 'agility', 'ap_mod', 'bear_ap_mod',
+        'shred_bonus', 'rip_bonus', 'feral_aggression', 't6_bonus',
+        'savage_fury', 'mangle_glyph', 'lacerate_multi'
+    )
+
+    # Player attributes written by the damage calculation
+    _damage_attrs = (
+        'multiplier', 'white_low', 'white_high', 'shred_low', 'shred_high',
+        'bite_multiplier', 'bite_low', 'bite_high', 'mangle_low',
+        'mangle_high', 'rake_hit', 'rake_tick', 'rip_tick', 'white_bear_low',
+        'white_bear_high', 'maul_low', 'maul_high', 'mangle_bear_low',
+        'mangle_bear_high', 'lacerate_hit', 'lacerate_tick'
+    )
+
+    def _calc_damage_params(
+            self, gift_of_arthas, boss_armor, sunder, faerie_fire,
+            blood_frenzy, shattering_throw, tigers_fury
+    ):
+        """Perform the uncached damage calculation for calc_damage_params."""
         bonus_damage = (
             (self.attack_power + self.debuff_ap) / 14 + self.bonus_damage
             + 80 * tigers_fury
@@ -349,6 +418,10 @@ class Player():
         ]:
             self.dmg_breakdown[cast_type] = {'casts': 0, 'damage': 0.0}
 
+        # Savage Roar damage is credited on nearly every attack, so keep a
+        # direct reference to its entry.
+        self._roar_breakdown = self.dmg_breakdown['Savage Roar']
+
     def set_ability_costs(self):
         """Store Energy costs for all specials in the rotation based on whether
         or not Berserk is active."""
@@ -380,7 +453,7 @@ class Player():
         else:
             proc_rate = self.omen_rates['bear']
 
-        proc_roll = np.random.rand()
+        proc_roll = sim_utils.rng.random()
 
         if proc_roll < proc_rate:
             self.omen_proc = True
@@ -393,7 +466,7 @@ class Player():
         if not self.jow:
             return
 
-        proc_roll = np.random.rand()
+        proc_roll = sim_utils.rng.random()
 
         if proc_roll < 0.25:
             self.mana = min(self.mana + 70, self.mana_pool)
@@ -447,7 +520,7 @@ class Player():
                 or (self.mana > self.mana_pool - 1500)):
             return False
 
-        self.mana += (900 + np.random.rand() * 600)
+        self.mana += (900 + sim_utils.rng.random() * 600)
         self.rune_cd = 15. * 60.
         return True
 
@@ -486,7 +559,10 @@ class Player():
             dodge = False
 
             if miss:
-                dodge = (np.random.rand() < self.dodge_chance/self.miss_chance)
+                dodge = (
+                    sim_utils.rng.random()
+                    < self.dodge_chance/self.miss_chance
+                )
 
             if dodge:
                 # Determine how much damage a successful non-crit / non-glance
@@ -504,9 +580,10 @@ class Player():
                 self.rage = min(self.rage + rage_gen, 100)
 
         # Log the swing
-        self.dmg_breakdown['Melee']['casts'] += 1
-        self.dmg_breakdown['Melee']['damage'] += damage_done
-        self.dmg_breakdown['Savage Roar']['damage'] += roar_damage
+        breakdown = self.dmg_breakdown['Melee']
+        breakdown['casts'] += 1
+        breakdown['damage'] += damage_done
+        self._roar_breakdown['damage'] += roar_damage
 
         if self.log:
             self.gen_log('melee', damage_done + roar_damage, miss, crit, False)
@@ -565,8 +642,9 @@ class Player():
             self.check_procs(crit=crit, yellow=yellow)
 
         # Log the cast
-        self.dmg_breakdown[ability_name]['casts'] += 1
-        self.dmg_breakdown[ability_name]['damage'] += damage_done
+        breakdown = self.dmg_breakdown[ability_name]
+        breakdown['casts'] += 1
+        breakdown['damage'] += damage_done
 
         if self.log:
             self.gen_log(ability_name, damage_done, miss, crit, clearcast)
@@ -668,9 +746,10 @@ class Player():
             self.check_procs(yellow=True, crit=crit)
 
         # Log the cast
-        self.dmg_breakdown[ability_name]['casts'] += 1
-        self.dmg_breakdown[ability_name]['damage'] += damage_done
-        self.dmg_breakdown['Savage Roar']['damage'] += roar_damage
+        breakdown = self.dmg_breakdown[ability_name]
+        breakdown['casts'] += 1
+        breakdown['damage'] += damage_done
+        self._roar_breakdown['damage'] += roar_damage
 
         if self.log:
             self.gen_log(
@@ -812,9 +891,10 @@ class Player():
             self.check_procs(yellow=True, crit=crit)
 
         # Log the cast
-        self.dmg_breakdown['Ferocious Bite']['casts'] += 1
-        self.dmg_breakdown['Ferocious Bite']['damage'] += damage_done
-        self.dmg_breakdown['Savage Roar']['damage'] += roar_damage
+        breakdown = self.dmg_breakdown['Ferocious Bite']
+        breakdown['casts'] += 1
+        breakdown['damage'] += damage_done
+        self._roar_breakdown['damage'] += roar_damage
 
         if self.log:
             self.gen_log(
@@ -832,7 +912,7 @@ class Player():
             success (bool): Whether the Rip debuff was successfully applied.
         """
         # Perform Monte Carlo to see if it landed and record damage per tick
-        miss = (np.random.rand() < self.miss_chance)
+        miss = (sim_utils.rng.random() < self.miss_chance)
         damage_per_tick = self.rip_tick[self.combo_points] * (not miss)
 
         # Set GCD
@@ -882,7 +962,7 @@ class Player():
         self.combo_points = 0
 
         # Log the cast
-        self.dmg_breakdown['Savage Roar']['casts'] += 1
+        self._roar_breakdown['casts'] += 1
 
         if self.log:
             self.gen_log('Savage Roar', 'applied', False, False, False)
@@ -907,7 +987,7 @@ class Player():
 
         if self.cat_form:
             self.cat_form = False
-            self.rage = 10 * (np.random.rand() < 0.2 * self.furor)
+            self.rage = 10 * (sim_utils.rng.random() < 0.2 * self.furor)
             cast_name = 'Shift (Bear)'
 
             # Bundle Enrage with the bear shift if available
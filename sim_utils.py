@@ -8,6 +8,21 @@ import multiprocessing
 import psutil
 
 
+# Random number generator shared by all of the sim modules. It is reseeded in
+# place by reseed(), so that existing references to it remain valid.
+rng = np.random.default_rng()
+
+
+def reseed(seed=None):
+    """Reseed the shared random number generator.
+
+    Arguments:
+        seed (int): New seed for the generator. Defaults to drawing fresh
+            entropy from the operating system.
+    """
+    rng.bit_generator.state = np.random.PCG64(seed).state
+
+
 def calc_white_damage(
     low_end, high_end, miss_chance, crit_chance,
     crit_multiplier=2.0
@@ -27,15 +42,15 @@ def calc_white_damage(
         miss (bool): True if the attack was avoided.
         crit (bool): True if the attack was a critical strike.
     """
-    outcome_roll = np.random.rand()
+    outcome_roll = rng.random()
 
     if outcome_roll < miss_chance:
         return 0.0, True, False
 
-    base_dmg = low_end + np.random.rand() * (high_end - low_end)
+    base_dmg = low_end + rng.random() * (high_end - low_end)
 
     if outcome_roll < miss_chance + 0.24:
-        glance_reduction = 0.15 + np.random.rand() * 0.2
+        glance_reduction = 0.15 + rng.random() * 0.2
         return (1.0 - glance_reduction) * base_dmg, False, False
     if outcome_roll < miss_chance + 0.24 + crit_chance:
         return crit_multiplier * base_dmg, False, True
@@ -61,13 +76,13 @@ def calc_yellow_damage(
         miss (bool): True if the attack was avoided.
         crit (bool): True if the attack was a critical strike.
     """
-    miss_roll = np.random.rand()
+    miss_roll = rng.random()
 
     if miss_roll < miss_chance:
         return 0.0, True, False
 
-    base_dmg = low_end + np.random.rand() * (high_end - low_end)
-    crit_roll = np.random.rand()
+    base_dmg = low_end + rng.random() * (high_end - low_end)
+    crit_roll = rng.random()
 
     if crit_roll < crit_chance:
         return crit_multiplier * base_dmg, False, True
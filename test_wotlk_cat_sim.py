@@ -0,0 +1,506 @@
+"""Regression tests for wotlk_cat_sim.Simulation."""
+
+import copy
+import pickle
+import numpy as np
+import pytest
+import player as player_class
+import sim_utils
+import trinkets
+import wotlk_cat_sim as ccs
+
+
+@pytest.fixture(autouse=True)
+def _close_worker_pool():
+    """Shut down any worker pool started by a test, so that worker processes
+    do not outlive it."""
+    yield
+    ccs.close_worker_pool()
+
+
+class _ConstantGenerator():
+
+    """Stand-in for the shared random number generator that returns the same
+    value for every uniform draw, and zero for every normal draw. Fights run
+    with it are fully deterministic, and independent of the order in which
+    the simulation consumes its random draws."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def random(self, size=None):
+        if size is None:
+            return self.value
+        return np.full(size, self.value)
+
+    def standard_normal(self, size=None):
+        if size is None:
+            return 0.0
+        return np.zeros(size)
+
+
+# Encounter strategies exercising the cat-only, Rake/Berserk and bearweaving
+# rotations
+_STRATEGIES = [
+    {},
+    {
+        'use_rake': True, 'use_berserk': True, 'prepop_berserk': True,
+        'bite_time': None
+    },
+    {
+        'bearweave': True, 'lacerate_prio': True, 'use_berserk': True,
+        'powerbear': True, 'preproc_omen': True
+    },
+    {
+        'bearweave': True, 'use_berserk': True, 'mangle_spam': True,
+        'bear_mangle': True, 'bite_time': None
+    },
+]
+
+
+def _make_sim(strategy=None, fight_length=60.0, with_trinkets=False):
+    """Construct a Simulation for a fixed test character.
+
+    Arguments:
+        strategy (dict): Strategy parameters for the Simulation. Defaults to
+            the default strategy.
+        fight_length (float): Fight length in seconds. Defaults to 60.
+        with_trinkets (bool): If True, equip a mix of activated, proc and
+            external cooldowns. Defaults False.
+
+    Returns:
+        sim (wotlk_cat_sim.Simulation): Configured Simulation.
+    """
+    player = player_class.Player(
+        attack_power=9000, ap_mod=1.21, agility=1000, hit_chance=0.06,
+        expertise_rating=20, crit_chance=0.55, armor_pen_rating=700,
+        swing_timer=0.8, mana=7000, intellect=300, spirit=200, mp5=0,
+        proc_trinkets=[]
+    )
+    trinket_list = []
+
+    if with_trinkets:
+        proc_trinkets = [
+            trinkets.ProcTrinket(
+                'haste_rating', 400, 'Tears', 0.0, 10, 50, chance_on_crit=0.1
+            ),
+            trinkets.InstantDamageProc(
+                'Extract', 788, 524, 15, 0.1, 0.1, periodic_only=True
+            ),
+            trinkets.StackingProcTrinket(
+                'attack_power', 44, 10, 'Battle Trance', 'Combat Insight',
+                1.0, 1.0, 20, 45, aura_type='proc',
+                aura_proc_rates={'white': 0.1, 'yellow': 0.1}
+            ),
+        ]
+        trinket_list = [
+            trinkets.ActivatedTrinket('attack_power', 500, 'AP', 20, 120)
+        ] + proc_trinkets + [
+            trinkets.Bloodlust(delay=1.0), trinkets.HastePotion(delay=1.0),
+            trinkets.ShatteringThrow(delay=1.0)
+        ]
+        player.proc_trinkets.extend(proc_trinkets)
+
+    sim = ccs.Simulation(
+        player, fight_length, 0.02, trinkets=trinket_list, hot_uptime=0.5,
+        **(strategy or {})
+    )
+    sim.set_active_debuffs(
+        ['gift_of_arthas', 'faerie_fire', 'sunder', 'blood_frenzy']
+    )
+    player.calc_damage_params(**sim.params)
+    return sim
+
+
+def _make_idle_sim():
+    """Construct a Simulation and run it once so that all per-fight state has
+    been initialized, then clear out its queued events.
+
+    Returns:
+        sim (wotlk_cat_sim.Simulation): Simulation with empty event heaps.
+    """
+    sim = _make_sim()
+    sim.run()
+    sim.event_heap.clear()
+    sim.expiration_heap.clear()
+    return sim
+
+
+def _rake_tick_with_mangle_end(mangle_end, tick_time=10.0):
+    """Queue a Rake tick together with a Mangle expiration, and return the
+    damage done by the tick.
+
+    Arguments:
+        mangle_end (float): Simulation time, in seconds, at which Mangle
+            falls off.
+        tick_time (float): Simulation time, in seconds, of the Rake tick.
+
+    Returns:
+        tick_damage (float): Damage done in the tick's time step.
+    """
+    sim = _make_idle_sim()
+    sim.mangle_debuff = True
+    sim.mangle_end = mangle_end
+    sim.schedule_expiration(ccs.EVT_MANGLE_END, mangle_end)
+    sim.rake_debuff = True
+    sim.rake_damage = 100.0
+    sim.rake_sr_snapshot = False
+    sim.schedule_ticks(ccs.DOT_RAKE, [tick_time], new=True)
+    return sim.process_events(tick_time)
+
+
+def test_bleed_tick_at_mangle_expiry_misses_mangle_bonus():
+    assert _rake_tick_with_mangle_end(10.0) == 100.0
+
+
+def test_bleed_tick_just_after_rounded_mangle_expiry():
+    assert _rake_tick_with_mangle_end(10.0 + 1e-12) == 100.0
+
+
+def test_bleed_tick_before_mangle_expiry_gets_mangle_bonus():
+    assert _rake_tick_with_mangle_end(12.0) == 130.0
+
+
+def test_final_bleed_tick_lands_before_bleed_falls_off():
+    sim = _make_idle_sim()
+    sim.mangle_debuff = False
+    sim.rake_debuff = True
+    sim.rake_damage = 100.0
+    sim.rake_sr_snapshot = False
+    sim.schedule_ticks(ccs.DOT_RAKE, [9.0 + 1e-12], new=True)
+    sim.schedule_expiration(ccs.EVT_RAKE_END, 9.0)
+    assert sim.process_events(9.0 + 1e-12) == 100.0
+    assert not sim.rake_debuff
+
+
+def test_expiration_does_not_force_a_time_step():
+    sim = _make_idle_sim()
+    sim.mangle_debuff = True
+    sim.mangle_end = 10.0
+    sim.schedule_expiration(ccs.EVT_MANGLE_END, 10.0)
+    assert not sim.event_heap
+    assert sim.process_events(9.0) == 0.0
+    assert sim.mangle_debuff
+    sim.process_events(10.5)
+    assert not sim.mangle_debuff
+
+
+# Total damage and number of time steps in 180 second fights with every random
+# draw fixed, as produced by the original per-step polling implementation of
+# the fight loop.
+_CONSTANT_DRAW_FIGHTS = [
+    (0.3, 0, 1318461.2324, 541),
+    (0.3, 1, 1344904.8249, 548),
+    (0.3, 2, 1693660.8377, 508),
+    (0.3, 3, 1353598.034, 473),
+    (0.7, 0, 825696.0859, 472),
+    (0.7, 1, 899942.3152, 512),
+    (0.7, 2, 954720.2454, 498),
+    (0.7, 3, 817669.6235, 450),
+]
+
+
+@pytest.mark.parametrize(
+    'draw, strategy_idx, total_damage, num_steps', _CONSTANT_DRAW_FIGHTS
+)
+def test_constant_draw_fight_is_unchanged(
+    monkeypatch, draw, strategy_idx, total_damage, num_steps
+):
+    monkeypatch.setattr(sim_utils, 'rng', _ConstantGenerator(draw))
+    sim = _make_sim(
+        dict(_STRATEGIES[strategy_idx]), fight_length=180.0 + 1e-9,
+        with_trinkets=True
+    )
+    times, damage = sim.run()[:2]
+    assert len(times) == num_steps
+    assert sum(damage) == pytest.approx(total_damage, rel=1e-12, abs=1e-4)
+
+
+# DPS of 180 second fights with a fixed seed, pinning the combined effect of
+# the random draw order in the event heap, swing schedule and proc code.
+_SEEDED_FIGHTS = [
+    (0, 6010.636875216858),
+    (1, 6242.169372214714),
+    (2, 6573.648915202124),
+    (3, 6037.5533113885995),
+]
+
+
+@pytest.mark.parametrize('strategy_idx, dps', _SEEDED_FIGHTS)
+def test_seeded_fight_is_unchanged(strategy_idx, dps):
+    outputs = [
+        _make_sim(
+            dict(_STRATEGIES[strategy_idx]), fight_length=180.0,
+            with_trinkets=True
+        ).iterate(seed=2024) for _ in range(2)
+    ]
+    assert outputs[0][0] == pytest.approx(dps, rel=1e-12)
+    assert outputs[0][:3] == outputs[1][:3]
+
+
+def _walk_swing_cursor(sim, num_swings):
+    """Step the swing schedule cursor through the upcoming swings.
+
+    Arguments:
+        sim (wotlk_cat_sim.Simulation): Simulation with a swing schedule.
+        num_swings (int): Number of swings to step through.
+
+    Returns:
+        swing_times (list of floats): Upcoming swing times, in seconds.
+    """
+    swing_times = []
+
+    for _ in range(num_swings):
+        swing_times.append(sim.next_swing)
+        sim.advance_swing()
+
+    return swing_times
+
+
+@pytest.mark.parametrize('fight_length', [60.0, 180.0 + 1e-9, 2.0])
+def test_swing_cursor_matches_explicit_schedule(fight_length):
+    sim = _make_idle_sim()
+    sim.fight_length = fight_length
+
+    # Fresh schedule at the start of the fight, as generated with
+    # np.arange() by the original list based implementation
+    sim.update_swing_times(0.037, 0.8, first_swing=True)
+    fresh_schedule = list(np.arange(0.037, fight_length + 0.8, 0.8))
+    assert _walk_swing_cursor(sim, len(fresh_schedule)) == fresh_schedule
+
+    # Rescaled schedule after a haste change partway through a swing
+    sim.update_swing_times(0.037, 0.8, first_swing=True)
+    swing_times = _walk_swing_cursor(sim, 2)
+    start_time = 1.5 + (sim.next_swing - 1.5) / 0.8 * (0.8 / 1.3)
+    sim.update_swing_times(1.5, 0.8 / 1.3)
+
+    if start_time > fight_length - 0.8 / 1.3:
+        expected = [start_time, start_time + 0.8 / 1.3]
+    else:
+        expected = list(np.arange(
+            start_time, fight_length + 0.8 / 1.3, 0.8 / 1.3
+        ))
+
+    assert swing_times == fresh_schedule[:2]
+    assert _walk_swing_cursor(sim, len(expected)) == expected
+
+
+def test_run_replicates_on_worker_pool():
+    sim = _make_idle_sim()
+    dps_vals = sim.run_replicates(4)
+    assert dps_vals.shape == (4,)
+    assert np.all(dps_vals > 0)
+    assert ccs._worker_pool is not None
+    ccs.close_worker_pool()
+    assert ccs._worker_pool is None
+
+
+def test_stat_increment_restored_when_iteration_fails(monkeypatch):
+    sim = _make_idle_sim()
+    attack_power = sim.player.attack_power
+
+    def fail(*args, **kwargs):
+        raise RuntimeError
+
+    monkeypatch.setattr(ccs.Simulation, 'iterate_dps', fail)
+
+    with pytest.raises(RuntimeError):
+        ccs._iterate_with_increment(sim, 'attack_power', 100.0)
+
+    assert sim.player.attack_power == attack_power
+
+
+def test_damage_param_cache_hit_matches_fresh_calculation():
+    sim = _make_idle_sim()
+    player = sim.player
+    params = dict(sim.params, tigers_fury=False)
+    player.calc_damage_params(**params)
+    player.calc_damage_params(**dict(params, tigers_fury=True))
+    player.attack_power += 100
+    player.calc_damage_params(**params)
+    player.attack_power -= 100
+
+    # Serve the original configuration from the memo, then recompute it
+    # from scratch for comparison.
+    num_entries = len(player._damage_param_cache)
+    player.calc_damage_params(**params)
+    assert len(player._damage_param_cache) == num_entries
+    cached_values = {
+        attr: copy.deepcopy(getattr(player, attr))
+        for attr in player._damage_attrs
+    }
+    player._calc_damage_params(**params)
+
+    for attr in player._damage_attrs:
+        np.testing.assert_equal(cached_values[attr], getattr(player, attr))
+
+
+def test_damage_param_cache_is_bounded():
+    sim = _make_idle_sim()
+    player = sim.player
+    cache_size = player_class.Player._damage_param_cache_size
+
+    for i in range(cache_size + 10):
+        player.attack_power += 1
+        player.calc_damage_params(**sim.params)
+
+    assert len(player._damage_param_cache) == cache_size
+
+
+def test_sunder_polling_stops_after_five_stacks(monkeypatch):
+    calls = []
+    update = ccs.ArmorDebuffs.update
+
+    def counting_update(self, time, player, sim):
+        calls.append(time)
+        return update(self, time, player, sim)
+
+    monkeypatch.setattr(ccs.ArmorDebuffs, 'update', counting_update)
+    sim = _make_sim()
+    times = sim.run(log=True)[0]
+    sunder_log = [
+        entry for entry in sim.combat_log if entry[1] == 'Sunder Armor'
+    ]
+    assert len(sunder_log) == 5
+    assert sim.params['sunder'] == 5
+    assert max(calls) == pytest.approx(float(sunder_log[-1][0]), abs=1e-3)
+    assert len(calls) < len(times)
+
+
+@pytest.mark.parametrize('cast_time', [0.024, 0.027, 0.056, 1.0, 12.345])
+def test_all_three_rake_ticks_land(monkeypatch, cast_time):
+    monkeypatch.setattr(sim_utils, 'rng', _ConstantGenerator(0.5))
+    sim = _make_idle_sim()
+    sim.rake(cast_time)
+    assert sim.rake_debuff
+
+    # Step through the tick times, with an extra time step exactly at the
+    # scheduled fall-off as if a swing or action landed there.
+    step_times = sorted(
+        [entry[0] for entry in sim.event_heap] + [sim.rake_end]
+    )
+    num_ticks = sum(
+        sim.process_events(step_time) > 0 for step_time in step_times
+    )
+    assert num_ticks == 3
+    assert not sim.rake_debuff
+
+
+def _bite_ready_sim(rip_left, roar_left, time=30.0):
+    """Construct a Simulation with Rip and Savage Roar active, full Energy and
+    Tiger's Fury available, for probing the analytical Bite decision.
+
+    Arguments:
+        rip_left (float): Remaining Rip duration, including full Glyph of
+            Shred extensions, in seconds.
+        roar_left (float): Remaining Savage Roar duration, in seconds.
+        time (float): Simulation time of the decision, in seconds. Defaults
+            to 30.
+
+    Returns:
+        sim (wotlk_cat_sim.Simulation): Configured Simulation.
+    """
+    sim = _make_idle_sim()
+    sim.rip_debuff = True
+    sim.rip_start = time + rip_left - sim._max_rip_dur
+    sim.rip_end = time + rip_left
+    sim.player.savage_roar = True
+    sim.roar_end = time + roar_left
+    sim.player.energy = 100.0
+    sim.player.tf_cd = 0.0
+    sim.player.berserk = False
+    return sim
+
+
+@pytest.mark.parametrize('rip_left, roar_left, can_bite', [
+    (1.0 - 1e-6, 20.0, False), (1.0 + 1e-6, 20.0, False),
+    (20.0, 1.0 - 1e-6, True), (20.0, 1.0 + 1e-6, True),
+])
+def test_bite_check_across_one_gcd_boundary(rip_left, roar_left, can_bite):
+    # With capped Energy and Tiger's Fury ready, the Energy projection allows
+    # a Bite even when Savage Roar is within a GCD of falling off, so the
+    # decision must not flip as the remaining duration crosses one second.
+    sim = _bite_ready_sim(rip_left, roar_left)
+    assert sim.can_bite_analytical(30.0) == can_bite
+
+
+def test_bite_check_skips_second_projection(monkeypatch):
+    sim = _bite_ready_sim(5.0, 20.0)
+    sim.player.energy = 0.0
+    projections = []
+    tf_expected_before = ccs.Simulation.tf_expected_before
+
+    def counting_tf_expected_before(self, current_time, future_time):
+        projections.append(future_time)
+        return tf_expected_before(self, current_time, future_time)
+
+    monkeypatch.setattr(
+        ccs.Simulation, 'tf_expected_before', counting_tf_expected_before
+    )
+    assert not sim.can_bite_analytical(30.0)
+    assert projections == [35.0]
+
+
+def test_bite_check_with_both_finishers_up():
+    assert _bite_ready_sim(20.0, 20.0).can_bite_analytical(30.0)
+
+
+class _InlinePool():
+
+    """Stand-in for a worker pool that runs tasks in this process, recording
+    the size of the pickled payload sent with each task."""
+
+    def __init__(self):
+        self.payload_sizes = []
+
+    def imap_unordered(self, func, iterable, chunksize=1):
+        for item in iterable:
+            self.payload_sizes.append(len(pickle.dumps((func, item))))
+            yield func(item)
+
+
+def test_replicate_tasks_do_not_carry_the_simulation():
+    sim = _make_sim()
+    pool = _InlinePool()
+    dps_vals = sim.run_replicates(4, pool=pool)
+    assert np.all(dps_vals > 0)
+    assert len(pool.payload_sizes) == 4
+    assert max(pool.payload_sizes) < len(pickle.dumps(sim)) / 10
+
+
+@pytest.mark.parametrize('num_replicates', [1, 4, 7])
+def test_length_offsets_are_antithetic(num_replicates):
+    sim_utils.reseed(11)
+    offsets = ccs._draw_length_offsets(num_replicates)
+    num_pairs = num_replicates // 2
+    assert len(offsets) == num_replicates
+    assert offsets[num_pairs:2 * num_pairs] == [
+        -offset for offset in offsets[:num_pairs]
+    ]
+    assert len(set(offsets)) == num_replicates
+
+
+def test_paired_replicate_shares_random_numbers():
+    sim = _make_sim()
+    stat_increments = [('attack_power', 0.0), ('attack_power', 100.0)]
+
+    with ccs._shared_sim_state(sim) as (batch_key, state_name):
+        dps_vals = [
+            ccs._run_paired_replicate(
+                batch_key, state_name, stat_increments, seed
+            ) for seed in (3, 3, 4)
+        ]
+
+    # A zero increment replays the base fight exactly, and a repeated seed
+    # replays the whole set of paired fights.
+    assert dps_vals[0][0] == dps_vals[0][1]
+    assert dps_vals[0][2] > dps_vals[0][0]
+    assert dps_vals[0] == dps_vals[1]
+    assert dps_vals[0] != dps_vals[2]
+
+
+def test_crn_stat_weights_are_reproducible():
+    sim = _make_sim(fight_length=30.0)
+    dps_deltas = [sim.calc_stat_weights_crn(2)[0] for _ in range(2)]
+    assert dps_deltas[0] == dps_deltas[1]
+    assert dps_deltas[0]['1 AP'] > 0
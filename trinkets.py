@@ -103,12 +103,7 @@ class Trinket():
         self.activation_time = time
         self.deactivation_time = time + self.proc_duration
         self.modify_stat(time, player, sim, self.stat_increment)
-        sim.proc_end_times.append(self.deactivation_time)
-
-        # In the case of a second trinket being used, the proc end time can
-        # sometimes be earlier than that of the first trinket, so the list of
-        # end times needs to be sorted.
-        sim.proc_end_times.sort()
+        sim.schedule_proc_end(self.deactivation_time)
 
         # Mark trinket as active
         self.active = True
@@ -469,7 +464,7 @@ class ProcTrinket(Trinket):
             self.proc_happened = False
             return
 
-        proc_roll = np.random.rand()
+        proc_roll = sim_utils.rng.random()
 
         if self.separate_yellow_procs:
             rate = self.rates['yellow'] if yellow else self.rates['white']
@@ -699,7 +694,7 @@ class InstantDamageProc(ProcTrinket):
             (8. - (player.miss_chance - player.dodge_chance) * 100)
             * 32.79 / 26.23 / 100
         )
-        miss_roll = np.random.rand()
+        miss_roll = sim_utils.rng.random()
 
         if miss_roll < miss_chance:
             if sim.log:
@@ -710,7 +705,9 @@ class InstantDamageProc(ProcTrinket):
             return 0.0
 
         # Now roll the base damage done by the proc
-        base_damage = self.min_damage + np.random.rand() * self.damage_range
+        base_damage = (
+            self.min_damage + sim_utils.rng.random() * self.damage_range
+        )
         base_damage *= 1.03 * 1.13 # assume Santified Retribution / CoE
 
         # Now roll for partial resists. Assume that the boss has no nature
@@ -718,7 +715,7 @@ class InstantDamageProc(ProcTrinket):
         # resistance of 24 for a boss mob. The partial resist table for this
         # condition was taken from this calculator:
         # https://royalgiraffe.github.io/legacy-sim/#/resistances
-        resist_roll = np.random.rand()
+        resist_roll = sim_utils.rng.random()
 
         if resist_roll < 0.84:
             dmg_done = base_damage
@@ -1,15 +1,340 @@
 """Code for simulating the classic WoW feral cat DPS rotation."""
 
 import numpy as np
+import math
 import copy
 import collections
+import heapq
+import itertools
+import functools
+import contextlib
+import os
+import pickle
+import atexit
 import urllib
 import multiprocessing
+import multiprocessing.resource_tracker
+import multiprocessing.shared_memory
 import psutil
 import sim_utils
 import player as player_class
 
 
+# Identifiers for the event types that are queued on the Simulation event
+# heap, which also serve as indices into its list of event generations.
+# Events that come due in the same time step are processed in this order, so
+# that buff and debuff expirations are applied before any bleed ticks, and
+# each bleed ticks before it falls off.
+EVT_TF_END = 0
+EVT_BERSERK_END = 1
+EVT_MANGLE_END = 2
+EVT_ROAR_END = 3
+DOT_RIP = 4
+EVT_RIP_END = 5
+DOT_RAKE = 6
+EVT_RAKE_END = 7
+DOT_LACERATE = 8
+EVT_LACERATE_END = 9
+EVT_PROC_END = 10
+NUM_EVENT_TYPES = 11
+
+# Crit chance gained per point of Agility, as a fraction, used for Agility
+# stat weight increments
+_CRIT_PER_AGILITY = 1. / 83.33 / 100.
+
+
+def _calc_floating_energy(time, pending_actions):
+    """Calculate how much Energy must be held back in order to refresh all
+    pending buffs and debuffs as soon as they fall off.
+
+    Arguments:
+        time (float): Current simulation time in seconds.
+        pending_actions (list of tuples): Unsorted (refresh_time,
+            refresh_cost) pairs for each upcoming buff or debuff refresh.
+
+    Returns:
+        floating_energy (float): Energy that should not be spent right now.
+    """
+    floating_energy = 0
+    previous_time = time
+    #tf_pending = False
+
+    for refresh_time, refresh_cost in sorted(pending_actions):
+        delta_t = refresh_time - previous_time
+
+        # if (not tf_pending):
+        #     tf_pending = self.tf_expected_before(time, refresh_time)
+
+        #     if tf_pending:
+        #         refresh_cost -= 60
+
+        if delta_t < refresh_cost / 10.:
+            floating_energy += refresh_cost - 10 * delta_t
+            previous_time = refresh_time
+        else:
+            previous_time += refresh_cost / 10.
+
+    return floating_energy
+
+
+# Pool of worker processes shared by all replicate calculations in this
+# process. It is created on first use and then kept alive until
+# close_worker_pool() is called, so that repeated sims do not pay for
+# starting up a fresh set of workers every time.
+_worker_pool = None
+
+
+def _count_worker_processes():
+    """Determine how many worker processes to run replicates on. This is one
+    per physical core, but capped at the number of CPUs this process is
+    allowed to run on, so that containers and jobs restricted to a subset of
+    the machine are not oversubscribed.
+
+    Returns:
+        num_procs (int): Number of worker processes.
+    """
+    try:
+        num_available = len(os.sched_getaffinity(0))
+    except AttributeError:
+        num_available = os.cpu_count() or 1
+
+    num_physical = psutil.cpu_count(logical=False) or num_available
+    return max(1, min(num_physical, num_available))
+
+
+def _get_worker_pool():
+    """Return the shared pool of worker processes for running replicates,
+    creating it if it does not exist yet.
+
+    Returns:
+        pool (multiprocessing.Pool): Shared pool of worker processes.
+    """
+    global _worker_pool
+
+    if _worker_pool is None:
+        # Start the resource tracker before the workers, so that they share
+        # it with this process rather than each starting their own. Otherwise
+        # every worker's tracker would try to clean up the shared memory
+        # blocks it attached to, after they were already unlinked here.
+        if os.name == 'posix':
+            multiprocessing.resource_tracker.ensure_running()
+
+        _worker_pool = multiprocessing.Pool(
+            processes=_count_worker_processes()
+        )
+
+    return _worker_pool
+
+
+def close_worker_pool():
+    """Shut down the shared pool of worker processes, if it is running. A
+    fresh pool is created the next time replicates are run. Registered to
+    run at interpreter exit, so that worker teardown does not depend on
+    garbage collection of the pool.
+    """
+    global _worker_pool
+
+    if _worker_pool is not None:
+        _worker_pool.terminate()
+        _worker_pool.join()
+        _worker_pool = None
+
+
+atexit.register(close_worker_pool)
+
+
+# Each batch of replicates pickles its Simulation once into a block of shared
+# memory, and tags it with a fresh key. Only the key and the name of the block
+# are sent along with the replicates. Worker processes read and unpickle a
+# given Simulation only the first time they see its key, and keep it around
+# for the remaining replicates.
+_replicate_batch_keys = itertools.count()
+_worker_sim = (None, None)
+
+
+@contextlib.contextmanager
+def _shared_sim_state(sim):
+    """Publish a pickled copy of a Simulation to the worker processes for the
+    duration of a batch of replicates.
+
+    Arguments:
+        sim (Simulation): Simulation to publish.
+
+    Yields:
+        batch_key (int): Fresh key identifying the batch.
+        state_name (str): Name of the shared memory block holding the pickled
+            Simulation.
+    """
+    sim_state = pickle.dumps(sim)
+    shared_state = multiprocessing.shared_memory.SharedMemory(
+        create=True, size=len(sim_state)
+    )
+
+    try:
+        shared_state.buf[:len(sim_state)] = sim_state
+        yield next(_replicate_batch_keys), shared_state.name
+    finally:
+        shared_state.close()
+        shared_state.unlink()
+
+
+def _draw_length_offsets(num_replicates):
+    """Draw the fight length offsets for a batch of replicates.
+
+    The offsets are drawn in antithetic pairs, so that every replicate that
+    runs long is matched by one that runs equally short. This cancels most
+    of the fight length noise in the mean DPS.
+
+    Arguments:
+        num_replicates (int): Number of replicates in the batch.
+
+    Returns:
+        length_offsets (list of floats): Offsets in seconds from the nominal
+            fight length, each with a standard normal distribution.
+    """
+    half_offsets = sim_utils.rng.standard_normal(num_replicates // 2)
+    return np.concatenate((
+        half_offsets, -half_offsets,
+        sim_utils.rng.standard_normal(num_replicates % 2)
+    )).tolist()
+
+
+def _get_worker_sim(batch_key, state_name):
+    """Retrieve the Simulation for a batch of replicates inside a worker
+    process, reading it from shared memory only if it has not been seen
+    before.
+
+    Arguments:
+        batch_key (int): Key identifying the batch of replicates.
+        state_name (str): Name of the shared memory block holding the pickled
+            Simulation for the batch.
+
+    Returns:
+        sim (Simulation): Worker-local copy of the Simulation.
+    """
+    global _worker_sim
+
+    key, sim = _worker_sim
+
+    if key != batch_key:
+        shared_state = multiprocessing.shared_memory.SharedMemory(
+            name=state_name
+        )
+
+        try:
+            sim = pickle.loads(shared_state.buf)
+        finally:
+            shared_state.close()
+
+        _worker_sim = (batch_key, sim)
+
+    return sim
+
+
+def _run_replicate(batch_key, state_name, detailed_output, length_offset):
+    """Run a single replicate inside a worker process.
+
+    Arguments:
+        batch_key (int): Key identifying the run_replicates() call.
+        state_name (str): Name of the shared memory block holding the
+            pickled Simulation for the call.
+        detailed_output (bool): If True, return the full output of
+            Simulation.iterate(), otherwise only the DPS value.
+        length_offset (float): Offset in seconds of the replicate's fight
+            length from the nominal fight length.
+
+    Returns:
+        output: Output of Simulation.iterate() or Simulation.iterate_dps().
+    """
+    sim = _get_worker_sim(batch_key, state_name)
+
+    if detailed_output:
+        return sim.iterate(length_offset=length_offset)
+    return sim.iterate_dps(length_offset=length_offset)
+
+
+def _iterate_with_increment(sim, param, increment, **kwargs):
+    """Run one iteration of a Simulation with a stat increment temporarily
+    applied. The stat is restored even if the iteration fails, so that the
+    worker's cached Simulation is left intact for later replicates.
+
+    Arguments:
+        sim (Simulation): Simulation to run.
+        param (str): Player attribute to increment.
+        increment (float): Magnitude of stat increment.
+        kwargs (dict): Keyword arguments passed on to
+            Simulation.iterate_dps().
+
+    Returns:
+        avg_dps (float): Average DPS on this iteration.
+    """
+    original_value = sim.increment_stat(param, increment)
+
+    try:
+        sim.player.calc_damage_params(**sim.params)
+        return sim.iterate_dps(**kwargs)
+    finally:
+        sim.restore_stat(param, increment, original_value)
+        sim.player.calc_damage_params(**sim.params)
+
+
+def _run_paired_replicate(batch_key, state_name, stat_increments, seed):
+    """Run a single replicate of a common random numbers stat weight
+    calculation inside a worker process. The base stats and each of the stat
+    increments are all simulated with the same random seed.
+
+    Arguments:
+        batch_key (int): Key identifying the stat weight calculation.
+        state_name (str): Name of the shared memory block holding the
+            pickled Simulation for the calculation.
+        stat_increments (list of tuples): (Player attribute, increment) pairs
+            for each stat increment.
+        seed (int): Random seed shared by all of the configurations.
+
+    Returns:
+        dps_vals (list of floats): DPS with the base stats, followed by the
+            DPS after each of the stat increments.
+    """
+    sim = _get_worker_sim(batch_key, state_name)
+    dps_vals = [sim.iterate_dps(seed=seed)]
+
+    for param, increment in stat_increments:
+        dps_vals.append(
+            _iterate_with_increment(sim, param, increment, seed=seed)
+        )
+
+    return dps_vals
+
+
+def _run_stat_replicate(batch_key, state_name, stat_increments, job):
+    """Run a single replicate of a stat weight calculation inside a worker
+    process, with one of the stat increments applied.
+
+    Arguments:
+        batch_key (int): Key identifying the stat weight calculation.
+        state_name (str): Name of the shared memory block holding the
+            pickled Simulation for the calculation.
+        stat_increments (list of tuples): (Player attribute, increment) pairs
+            for each stat increment.
+        job (tuple): (stat index, fight length offset) pair for the
+            replicate. A stat index of None runs the base stats.
+
+    Returns:
+        stat_idx (int): Stat index of the job, used to sort the results.
+        avg_dps (float): Average DPS on this replicate.
+    """
+    sim = _get_worker_sim(batch_key, state_name)
+    stat_idx, length_offset = job
+
+    if stat_idx is None:
+        return stat_idx, sim.iterate_dps(length_offset=length_offset)
+
+    param, increment = stat_increments[stat_idx]
+    return stat_idx, _iterate_with_increment(
+        sim, param, increment, length_offset=length_offset
+    )
+
+
 class ArmorDebuffs():
 
     """Controls the delayed application of boss armor debuffs after an
@@ -17,6 +342,8 @@ class ArmorDebuffs():
     modeled with delayed application, and all other boss debuffs are modeled
     as applying instantly at the fight start."""
 
+    __slots__ = ('params', 'use_sunder')
+
     def __init__(self, sim):
         """Initialize controller by specifying whether Sunder, EA, or both will
         be applied.
@@ -50,6 +377,11 @@ class ArmorDebuffs():
                 modified by the trinket proc.
             sim (tbc_cat_sim.Simulation): Simulation object controlling the
                 fight execution.
+
+        Returns:
+            pending (bool): Whether any debuff applications are still to come
+                in this fight. Once this is False, the controller need not be
+                updated again until it is reset for the next fight.
         """
         # If we are Sundering and are at less than 5 stacks, then add a stack
         # every GCD.
@@ -64,7 +396,7 @@ class ArmorDebuffs():
 
             player.calc_damage_params(**self.params)
 
-        return 0.0
+        return self.use_sunder and (self.params['sunder'] < 5)
 
 
 class UptimeTracker():
@@ -72,15 +404,27 @@ class UptimeTracker():
     """Provides an interface for tracking average uptime on buffs and debuffs,
     analogous to Trinket objects."""
 
+    __slots__ = ('active_time', 'last_update', 'active', 'num_procs')
+
     def __init__(self):
         self.reset()
 
     def reset(self):
-        self.uptime = 0.0
+        self.active_time = 0.0
         self.last_update = 15.0
         self.active = False
         self.num_procs = 0
 
+    @property
+    def uptime(self):
+        """Fractional aura uptime over the tracked portion of the fight. The
+        active time is accumulated during the fight and only normalized here,
+        when the uptime is actually read."""
+        if self.last_update <= 15.0:
+            return 0.0
+
+        return self.active_time / (self.last_update - 15.)
+
     def update(self, time, player, sim):
         """Update average aura uptime at a new timestep.
 
@@ -92,12 +436,11 @@ class UptimeTracker():
                 fight execution.
         """
         if (time > self.last_update) and (time < sim.fight_length - 15):
-            dt = time - self.last_update
             active_now = self.is_active(player, sim)
-            self.uptime = (
-                (self.uptime * (self.last_update - 15.) + dt * active_now)
-                / (time - 15.)
-            )
+
+            if active_now:
+                self.active_time += time - self.last_update
+
             self.last_update = time
 
             if active_now and (not self.active):
@@ -130,6 +473,7 @@ class UptimeTracker():
 
 
 class RipTracker(UptimeTracker):
+    __slots__ = ()
     proc_name = 'Rip'
 
     def is_active(self, player, sim):
@@ -137,6 +481,7 @@ class RipTracker(UptimeTracker):
 
 
 class RoarTracker(UptimeTracker):
+    __slots__ = ()
     proc_name = 'Savage Roar'
 
     def is_active(self, player, sim):
@@ -177,6 +522,24 @@ class Simulation():
         'min_roar_offset': 10.0,
     }
 
+    # Fixed attribute layout for fast attribute access in the fight loop. The
+    # "_s_" entries hold the strategy snapshot taken by _cache_strategy().
+    __slots__ = (
+        'player', 'fight_length', 'latency', 'trinkets', 'params', 'strategy',
+        'debuff_controller', 'haste_multiplier', 'revitalize_frequency',
+        'event_heap', 'expiration_heap', 'event_generations', 'log',
+        'combat_log', 'time_to_oom', 'next_action', 'swing_timer',
+        'next_swing', '_swing_start', '_swing_delta', '_swing_idx',
+        'mangle_debuff', 'mangle_end', 'rip_debuff', 'rip_start', 'rip_end',
+        'rip_damage', 'rip_crit_chance', 'rip_sr_snapshot', 'rake_debuff',
+        'rake_end', 'rake_damage', 'rake_sr_snapshot', 'lacerate_debuff',
+        'lacerate_end', 'lacerate_stacks', 'lacerate_damage',
+        'lacerate_crit_chance', 'last_lacerate_tick', 'roar_end', 'tf_end',
+        'berserk_end', '_berserk_cache', '_max_rip_dur', '_roar_durations',
+        '_furor_cap', '_weave_energy', '_bleed_crit_rolls', '_bleed_roll_idx',
+        'total_damage'
+    ) + tuple('_s_' + key for key in default_strategy)
+
     def __init__(
         self, player, fight_length, latency, trinkets=[], haste_multiplier=1.0,
         hot_uptime=0.0, **kwargs
@@ -208,26 +571,45 @@ class Simulation():
         self.fight_length = fight_length
         self.latency = latency
         self.trinkets = trinkets
-        self.params = copy.deepcopy(self.default_params)
-        self.strategy = copy.deepcopy(self.default_strategy)
-
-        for key, value in kwargs.items():
-            if key in self.params:
-                self.params[key] = value
-            elif key in self.strategy:
-                self.strategy[key] = value
-            else:
-                raise KeyError(
-                    ('"%s" is not a supported parameter. Supported encounter '
-                     'parameters are: %s. Supported strategy parameters are: '
-                     '%s.') % (key, self.params.keys(), self.strategy.keys())
-                )
 
-        # Set up controller for delayed armor debuffs. The controller can be
-        # treated identically to a Trinket object as far as the sim is
-        # concerned.
+        # The default dicts contain only immutable scalars, so a shallow copy
+        # is sufficient and much cheaper than a deepcopy.
+        self.params = self.default_params.copy()
+        self.strategy = self.default_strategy.copy()
+
+        unknown_keys = (
+            kwargs.keys() - self.params.keys() - self.strategy.keys()
+        )
+
+        if unknown_keys:
+            key = next(key for key in kwargs if key in unknown_keys)
+            raise KeyError(
+                ('"%s" is not a supported parameter. Supported encounter '
+                 'parameters are: %s. Supported strategy parameters are: '
+                 '%s.') % (key, self.params.keys(), self.strategy.keys())
+            )
+
+        self.params.update(
+            (key, value) for key, value in kwargs.items() if key in self.params
+        )
+        self.strategy.update(
+            (key, value) for key, value in kwargs.items()
+            if key in self.strategy
+        )
+
+        self._cache_strategy()
+
+        # Set up the event heaps, which hold timed events as (time, event
+        # type, generation) tuples. Bleed ticks and proc ends on the event
+        # heap each get a time step of their own, while aura expirations are
+        # only applied at the next time step that comes up for another reason.
+        self.event_heap = []
+        self.expiration_heap = []
+        self.event_generations = [0] * NUM_EVENT_TYPES
+
+        # Set up controller for delayed armor debuffs. The controller is
+        # updated alongside the trinkets on every time step.
         self.debuff_controller = ArmorDebuffs(self)
-        self.trinkets.append(self.debuff_controller)
 
         # Set up trackers for Rip and Roar uptime
         self.trinkets.append(RipTracker())
@@ -269,6 +651,34 @@ class Simulation():
             )
 
         self.debuff_controller.process_params()
+        self._cache_strategy()
+
+    def _cache_player_constants(self):
+        """Store Player quantities that stay fixed over the course of a fight
+        as Simulation attributes, to avoid recomputing them in the rotation
+        logic. Called at the start of every run so that any changes to the
+        Player or latency between runs are picked up."""
+        self._max_rip_dur = (
+            self.player.rip_duration + 6 * self.player.shred_glyph
+        )
+        self._roar_durations = self.player.roar_durations
+
+        # Energy thresholds for bearweaving, which depend only on talents and
+        # latency
+        self._furor_cap = min(20 * self.player.furor, 85)
+        # weave_energy = min(furor_cap - 30 - 20 * self.latency, 42)
+        self._weave_energy = self._furor_cap - 30 - 20 * self.latency
+
+        if self.player.furor > 3:
+            self._weave_energy -= 15
+
+    def _cache_strategy(self):
+        """Snapshot each strategy entry into an "_s_<key>" instance attribute,
+        so that the rotation logic can read the strategy via fast attribute
+        loads rather than repeated dict lookups. Must be re-run whenever the
+        strategy dict is modified."""
+        for key, value in self.strategy.items():
+            setattr(self, '_s_' + key, value)
 
     def gen_log(self, time, event, outcome):
         """Generate a custom combat log entry.
@@ -299,8 +709,9 @@ class Simulation():
         if success:
             self.mangle_debuff = True
             self.mangle_end = (
-                np.inf if self.strategy['bear_mangle'] else (time + 60.0)
+                math.inf if self._s_bear_mangle else (time + 60.0)
             )
+            self.schedule_expiration(EVT_MANGLE_END, self.mangle_end)
 
         return damage_done
 
@@ -319,7 +730,10 @@ class Simulation():
         if success:
             self.rake_debuff = True
             self.rake_end = time + 9.0
-            self.rake_ticks = list(np.arange(time + 3, time + 9.01, 3))
+            self.schedule_expiration(EVT_RAKE_END, self.rake_end)
+            self.schedule_ticks(
+                DOT_RAKE, [time + 3.0, time + 6.0, time + 9.0], new=True
+            )
             self.rake_damage = self.player.rake_tick
             self.rake_sr_snapshot = self.player.savage_roar
 
@@ -338,6 +752,7 @@ class Simulation():
 
         if success:
             self.lacerate_end = time + 15.0
+            self.schedule_expiration(EVT_LACERATE_END, self.lacerate_end)
 
             if self.lacerate_debuff:
                 # Unlike our other bleeds, Lacerate maintains its tick rate
@@ -345,18 +760,18 @@ class Simulation():
                 # extend the duration. Note that the current implementation
                 # allows for Lacerate to be refreshed *after* the final tick
                 # goes out as long as it happens before the duration expires.
-                if self.lacerate_ticks:
-                    last_tick = self.lacerate_ticks[-1]
-                else:
-                    last_tick = self.last_lacerate_tick
-
-                self.lacerate_ticks += list(np.arange(
-                    last_tick + 3, self.lacerate_end + 1e-9, 3
-                ))
+                last_tick = self.last_lacerate_tick
+                num_ticks = int((self.lacerate_end + 1e-9 - last_tick) // 3)
+                self.schedule_ticks(DOT_LACERATE, [
+                    last_tick + 3.0 * (i + 1) for i in range(num_ticks)
+                ])
                 self.lacerate_stacks = min(self.lacerate_stacks + 1, 5)
             else:
                 self.lacerate_debuff = True
-                self.lacerate_ticks = list(np.arange(time + 3, time + 16, 3))
+                self.schedule_ticks(
+                    DOT_LACERATE, [time + 3.0 * (i + 1) for i in range(5)],
+                    new=True
+                )
                 self.lacerate_stacks = 1
 
             self.lacerate_damage = (
@@ -379,7 +794,10 @@ class Simulation():
             self.rip_debuff = True
             self.rip_start = time
             self.rip_end = time + self.player.rip_duration
-            self.rip_ticks = list(np.arange(time + 2, self.rip_end + 1e-9, 2))
+            self.schedule_expiration(EVT_RIP_END, self.rip_end)
+            self.schedule_ticks(DOT_RIP, [
+                time + 2.0 * (i + 1) for i in range(self.player.rip_num_ticks)
+            ], new=True)
             self.rip_damage = damage_per_tick
             self.rip_crit_chance = self.player.crit_chance
             self.rip_sr_snapshot = self.player.savage_roar
@@ -396,12 +814,170 @@ class Simulation():
 
         # If it landed, apply Glyph of Shred
         if success and self.rip_debuff and self.player.shred_glyph:
-            if (self.rip_end - self.rip_start) < self.player.rip_duration + 6:
+            if (self.rip_end - self.rip_start) < self._max_rip_dur:
                 self.rip_end += 2
-                self.rip_ticks.append(self.rip_end)
+                self.schedule_ticks(DOT_RIP, [self.rip_end])
+                self.schedule_expiration(EVT_RIP_END, self.rip_end)
 
         return damage_done
 
+    def schedule_ticks(self, dot_id, tick_times, new=False):
+        """Queue up periodic damage ticks for a bleed on the event heap.
+
+        Arguments:
+            dot_id (int): Identifier of the bleed, one of DOT_RIP, DOT_RAKE or
+                DOT_LACERATE.
+            tick_times (list of floats): Simulation times, in seconds, at
+                which the new ticks occur.
+            new (bool): If True, a fresh application of the bleed is starting,
+                and any ticks still queued from a previous application are
+                discarded. Defaults False, which extends the existing bleed.
+        """
+        if new:
+            self.cancel_events(dot_id)
+
+        generation = self.event_generations[dot_id]
+
+        for tick_time in tick_times:
+            heapq.heappush(self.event_heap, (tick_time, dot_id, generation))
+
+        if (dot_id == DOT_LACERATE) and tick_times:
+            self.last_lacerate_tick = tick_times[-1]
+
+    def schedule_expiration(self, event_type, end_time):
+        """Queue up the expiration of a buff or debuff on the expiration heap,
+        superseding any previously scheduled expiration of the same aura.
+        Expirations do not force a time step of their own, and are applied at
+        the first time step at or after the scheduled time.
+
+        Arguments:
+            event_type (int): Identifier of the expiration event, one of the
+                EVT_*_END constants.
+            end_time (float): Simulation time, in seconds, at which the aura
+                falls off. Auras with infinite duration are not queued.
+        """
+        self.cancel_events(event_type)
+
+        if end_time < math.inf:
+            heapq.heappush(self.expiration_heap, (
+                end_time, event_type, self.event_generations[event_type]
+            ))
+
+    def schedule_proc_end(self, end_time):
+        """Queue up a time step at which a trinket proc or player cooldown
+        ends, so that the change can be acted upon immediately.
+
+        Arguments:
+            end_time (float): Simulation time, in seconds, at which the proc
+                or cooldown ends.
+        """
+        heapq.heappush(self.event_heap, (end_time, EVT_PROC_END, 0))
+
+    def cancel_events(self, event_type):
+        """Invalidate all queued events of a given type. Stale heap entries are
+        lazily discarded when they reach the front of the heap.
+
+        Arguments:
+            event_type (int): Identifier of the event type, such as DOT_RIP or
+                EVT_RIP_END.
+        """
+        self.event_generations[event_type] += 1
+
+    def process_expiration(self, event_type, time):
+        """Remove a buff or debuff whose scheduled expiration has come up, and
+        document if requested.
+
+        Arguments:
+            event_type (int): Identifier of the expiration event, one of the
+                EVT_*_END constants.
+            time (float): Scheduled time, in seconds, at which the aura falls
+                off. Used only for logging.
+        """
+        if event_type == EVT_TF_END:
+            self.drop_tigers_fury(time)
+            return
+        if event_type == EVT_BERSERK_END:
+            self.drop_berserk(time)
+            return
+
+        if event_type == EVT_MANGLE_END:
+            self.mangle_debuff = False
+            aura_name = 'Mangle'
+        elif event_type == EVT_ROAR_END:
+            self.player.savage_roar = False
+            aura_name = 'Savage Roar'
+        elif event_type == EVT_RIP_END:
+            self.rip_debuff = False
+            self.cancel_events(DOT_RIP)
+            aura_name = 'Rip'
+        elif event_type == EVT_RAKE_END:
+            self.rake_debuff = False
+            self.cancel_events(DOT_RAKE)
+            aura_name = 'Rake'
+        else:
+            self.lacerate_debuff = False
+            self.cancel_events(DOT_LACERATE)
+            aura_name = 'Lacerate'
+
+        if self.log:
+            self.combat_log.append(self.gen_log(time, aura_name, 'falls off'))
+
+    def process_events(self, time):
+        """Pop all queued events that are due at the current time step off the
+        event and expiration heaps, and apply them in order of event type.
+
+        Arguments:
+            time (float): Simulation time, in seconds. Expirations scheduled up
+                to 1e-9 seconds later are also treated as due, so that rounding
+                in the scheduled times cannot reorder coincident events.
+
+        Returns:
+            dmg_done (float): Damage done by bleed ticks in this time step.
+        """
+        event_heap = self.event_heap
+        expiration_heap = self.expiration_heap
+        due_events = []
+
+        while event_heap and (event_heap[0][0] <= time):
+            event_time, event_type, generation = heapq.heappop(event_heap)
+            due_events.append((event_type, generation, event_time))
+
+        while expiration_heap and (expiration_heap[0][0] <= time + 1e-9):
+            end_time, event_type, generation = heapq.heappop(expiration_heap)
+            due_events.append((event_type, generation, end_time))
+
+        due_events.sort()
+        dmg_done = 0.0
+
+        for event_type, generation, event_time in due_events:
+            # Skip events that have since been superseded, such as ticks from
+            # bleeds that were reapplied or fell off, or expirations of auras
+            # that were refreshed
+            if generation != self.event_generations[event_type]:
+                continue
+
+            if event_type == DOT_RIP:
+                dmg_done += self.apply_bleed_damage(
+                    self.rip_damage, self.rip_crit_chance, 'Rip',
+                    self.rip_sr_snapshot, time
+                )
+            elif event_type == DOT_RAKE:
+                dmg_done += self.apply_bleed_damage(
+                    self.rake_damage, 0, 'Rake', self.rake_sr_snapshot, time
+                )
+            elif event_type == DOT_LACERATE:
+                dmg_done += self.apply_bleed_damage(
+                    self.lacerate_damage, self.lacerate_crit_chance,
+                    'Lacerate', False, time
+                )
+            elif event_type != EVT_PROC_END:
+                self.process_expiration(event_type, event_time)
+
+            # Proc and cooldown ends only need a time step of their own, and
+            # are handled by the trinket updates in run().
+
+        return dmg_done
+
     def berserk_expected_at(self, current_time, future_time):
         """Determine whether the Berserk buff is predicted to be active at
         the requested future time.
@@ -422,10 +998,33 @@ class Simulation():
             )
         if self.player.berserk_cd > 1e-9:
             return (future_time > current_time + self.player.berserk_cd)
-        if self.params['tigers_fury'] and self.strategy['use_berserk']:
+        if self.params['tigers_fury'] and self._s_use_berserk:
             return (future_time > self.tf_end)
         return False
 
+    def _berserk_at(self, current_time, future_time):
+        """Cached version of berserk_expected_at() for use during a single
+        rotation decision. The cache is reset at the start of each call to
+        execute_rotation().
+
+        Arguments:
+            current_time (float): Current simulation time in seconds.
+            future_time (float): Future time, in seconds, for querying Berserk
+                status.
+
+        Returns:
+            berserk_expected (bool): True if Berserk should be active at the
+                specified future time, False otherwise.
+        """
+        try:
+            return self._berserk_cache[future_time]
+        except KeyError:
+            berserk_expected = self.berserk_expected_at(
+                current_time, future_time
+            )
+            self._berserk_cache[future_time] = berserk_expected
+            return berserk_expected
+
     def tf_expected_before(self, current_time, future_time):
         """Determine whether Tiger's Fury is predicted to be used prior to the
         requested future time.
@@ -457,10 +1056,10 @@ class Simulation():
         Returns:
             can_bite (bool): True if Biting now is optimal.
         """
-        if self.strategy['bite_time'] is not None:
+        if self._s_bite_time is not None:
             return (
-                (self.rip_end - time >= self.strategy['bite_time'])
-                and (self.roar_end - time >= self.strategy['bite_time'])
+                (self.rip_end - time >= self._s_bite_time)
+                and (self.roar_end - time >= self._s_bite_time)
             )
         return self.can_bite_analytical(time)
 
@@ -476,36 +1075,13 @@ class Simulation():
             can_bite (bool): True if the analytical model indicates that Biting
                 now is optimal, False otherwise.
         """
-        # First calculate how much Energy we expect to accumulate before our
-        # next finisher expires.
-        maxripdur = self.player.rip_duration + 6 * self.player.shred_glyph
+        maxripdur = self._max_rip_dur
         ripdur = self.rip_start + maxripdur - time
         srdur = self.roar_end - time
         mindur = min(ripdur, srdur)
         maxdur = max(ripdur, srdur)
-        expected_energy_gain_min = 10 * mindur
-        expected_energy_gain_max = 10 * maxdur
-
-        if self.tf_expected_before(time, time + mindur):
-            expected_energy_gain_min += 60
-        if self.tf_expected_before(time, time + maxdur):
-            expected_energy_gain_max += 60
-
-        if self.player.omen:
-            expected_energy_gain_min += mindur / self.swing_timer * (
-                3.5 / 60. * (1 - self.player.miss_chance) * 42
-            )
-            expected_energy_gain_max += maxdur / self.swing_timer * (
-                3.5 / 60. * (1 - self.player.miss_chance) * 42
-            )
-
-        expected_energy_gain_min += mindur/self.revitalize_frequency*0.15*8
-        expected_energy_gain_max += maxdur/self.revitalize_frequency*0.15*8
-
-        total_energy_min = self.player.energy + expected_energy_gain_min
-        total_energy_max = self.player.energy + expected_energy_gain_max
 
-        # Now calculate the effective Energy cost for Biting now, which
+        # First calculate the effective Energy cost for Biting now, which
         # includes the cost of the Ferocious Bite itself, the cost of building
         # CPs for Rip and Roar, and the cost of Rip/Roar.
         ripcost, bitecost, srcost = self.get_finisher_costs(time)
@@ -524,10 +1100,6 @@ class Simulation():
         total_energy_cost_min = (
             bitecost + 5. / cp_per_builder * cost_per_builder + nextcost
         )
-        total_energy_cost_max = (
-            bitecost + (5. + secondcps) / cp_per_builder * cost_per_builder
-            + ripcost + srcost
-        )
 
         # Actual Energy cost is a bit lower than this because it is okay to
         # lose a few seconds of Rip or SR uptime to gain a Bite.
@@ -537,16 +1109,46 @@ class Simulation():
         rip_downtime = maxripdur * (1 - 1. / (1. + rip_downtime / maxripdur))
         sr_downtime = 34. * (1 - 1. / (1. + sr_downtime / 34.))
         next_downtime = sr_downtime if srdur < ripdur else rip_downtime
-
         total_energy_cost_min -= 10 * next_downtime
+
+        # Then calculate how much Energy we expect to accumulate before our
+        # next finisher expires, and recommend Biting now only if it exceeds
+        # the effective cost. If it does not, there is no need to project
+        # Energy out to the later finisher.
+        omen_energy_per_swing = 0.
+        if self.player.omen:
+            omen_energy_per_swing = (
+                3.5 / 60. * (1 - self.player.miss_chance) * 42
+            )
+
+        expected_energy_gain_min = 10 * mindur
+        if self.tf_expected_before(time, time + mindur):
+            expected_energy_gain_min += 60
+        expected_energy_gain_min += (
+            mindur / self.swing_timer * omen_energy_per_swing
+        )
+        expected_energy_gain_min += mindur/self.revitalize_frequency*0.15*8
+        total_energy_min = self.player.energy + expected_energy_gain_min
+
+        if total_energy_min <= total_energy_cost_min:
+            return False
+
+        # Otherwise, Energy must also suffice for refreshing both finishers.
+        total_energy_cost_max = (
+            bitecost + (5. + secondcps) / cp_per_builder * cost_per_builder
+            + ripcost + srcost
+        )
         total_energy_cost_max -= 10 * min(rip_downtime, sr_downtime)
 
-        # Then we simply recommend Biting now if the available Energy to do so
-        # exceeds the effective cost.
-        return (
-            (total_energy_min > total_energy_cost_min)
-            and (total_energy_max > total_energy_cost_max)
+        expected_energy_gain_max = 10 * maxdur
+        if self.tf_expected_before(time, time + maxdur):
+            expected_energy_gain_max += 60
+        expected_energy_gain_max += (
+            maxdur / self.swing_timer * omen_energy_per_swing
         )
+        expected_energy_gain_max += maxdur/self.revitalize_frequency*0.15*8
+        total_energy_max = self.player.energy + expected_energy_gain_max
+        return total_energy_max > total_energy_cost_max
 
     def get_finisher_costs(self, time):
         """Determine the expected Energy cost for Rip when it needs to be
@@ -562,7 +1164,7 @@ class Simulation():
             srcost (float): Energy cost of a Savage Roar refresh.
         """
         rip_end = time if (not self.rip_debuff) else self.rip_end
-        ripcost = 15 if self.berserk_expected_at(time, rip_end) else 30
+        ripcost = 15 if self._berserk_at(time, rip_end) else 30
 
         if self.player.energy >= self.player.bite_cost:
             bitecost = min(self.player.bite_cost + 30, self.player.energy)
@@ -570,7 +1172,7 @@ class Simulation():
             bitecost = self.player.bite_cost + 10 * self.latency
 
         sr_end = time if (not self.player.savage_roar) else self.roar_end
-        srcost = 12.5 if self.berserk_expected_at(time, sr_end) else 25
+        srcost = 12.5 if self._berserk_at(time, sr_end) else 25
 
         return ripcost, bitecost, srcost
 
@@ -590,8 +1192,8 @@ class Simulation():
             allowed_sr_downtime (float): Maximum acceptable Savage Roar
                 downtime, in seconds.
         """
-        rip_cp = self.strategy['min_combos_for_rip']
-        bite_cp = self.strategy['min_combos_for_bite']
+        rip_cp = self._s_min_combos_for_rip
+        bite_cp = self._s_min_combos_for_bite
         rip_cost, bite_cost, roar_cost = self.get_finisher_costs(time)
         crit_factor = self.player.calc_crit_multiplier() - 1
         bite_base_dmg = 0.5 * (
@@ -647,8 +1249,7 @@ class Simulation():
             return False
 
         # Project Rip end time assuming full Glyph of Shred extensions.
-        max_rip_dur = self.player.rip_duration + 6 * self.player.shred_glyph
-        rip_end = self.rip_start + max_rip_dur
+        rip_end = self.rip_start + self._max_rip_dur
 
         # If the existing Roar already falls off well after the existing Roar,
         # then no need to clip.
@@ -657,12 +1258,12 @@ class Simulation():
             return False
 
         # Calculate when Roar would end if we cast it now.
-        new_roar_dur = self.player.roar_durations[self.player.combo_points]
+        new_roar_dur = self._roar_durations[self.player.combo_points]
         new_roar_end = time + new_roar_dur
 
         # Clip as soon as we have enough CPs for the new Roar to expire well
         # after the current Rip.
-        return (new_roar_end >= rip_end + self.strategy['min_roar_offset'])
+        return (new_roar_end >= rip_end + self._s_min_roar_offset)
 
     # def clip_roar(self, time):
     #     """Determine whether to clip a currently active Savage Roar in order to
@@ -723,6 +1324,58 @@ class Simulation():
     #     return roardur <= self.strategy['max_roar_clip']
     #     # return True
 
+    def calc_maul_rage_threshold(self, time):
+        """Determine how much Rage is needed to Maul on a Dire Bear Form melee
+        swing. If we will have enough time and Energy leeway to stay in Dire
+        Bear Form once the GCD expires, then only Maul if we will be left with
+        enough Rage to cast Mangle or Lacerate on that global. The checks are
+        made in priority order, and return as soon as one of them applies.
+
+        Arguments:
+            time (float): Current simulation time in seconds.
+
+        Returns:
+            maul_rage_thresh (int): Minimum Rage required for a Maul.
+        """
+        gcd = self.player.gcd
+
+        # Emergency Lacerate refresh on the next global
+        if self._s_lacerate_prio and self.lacerate_debuff and (
+            self.lacerate_end - time <= gcd + 3.0 + 2 * self.latency
+        ):
+            return 23
+
+        # Shift back into Cat Form on the next global
+        energy_leeway = self._furor_cap - 15 - 10 * (gcd + self.latency)
+
+        if self.player.energy > energy_leeway:
+            return 10
+        if (self.rip_debuff and (self.rip_end < self.fight_length - 10)
+                and (self.rip_end < time + gcd + 3.0)):
+            return 10
+
+        if self._s_lacerate_prio:
+            lacerate_next = (
+                (not self.lacerate_debuff) or (self.lacerate_stacks < 5)
+                or (self.lacerate_end - time <= gcd + self._s_lacerate_time)
+            )
+            mangle_next = (not lacerate_next) and (
+                (not self.mangle_debuff)
+                or (self.mangle_end < time + gcd + 3.0)
+            )
+        else:
+            mangle_next = (self.player.mangle_cd < gcd)
+            lacerate_next = self.lacerate_debuff and (
+                (self.lacerate_stacks < 5)
+                or (self.lacerate_end < time + gcd + 4.5)
+            )
+
+        if mangle_next:
+            return 25
+        if lacerate_next:
+            return 23
+        return 10
+
     def execute_rotation(self, time):
         """Execute the next player action in the DPS rotation according to the
         specified player strategy in the simulation.
@@ -749,14 +1402,24 @@ class Simulation():
             # Swing timer only updates on the next swing after we shift
             swing_fac = 1/2.5 if self.player.cat_form else 2.5
             self.update_swing_times(
-                self.swing_times[0], self.swing_timer * swing_fac,
+                self.next_swing, self.swing_timer * swing_fac,
                 first_swing=True
             )
             return 0.0
 
-        energy, cp = self.player.energy, self.player.combo_points
-        rip_cp = self.strategy['min_combos_for_rip']
-        bite_cp = self.strategy['min_combos_for_bite']
+        # Player and buff state is fixed while the rotation decision below is
+        # being made, so Berserk predictions can be shared across its checks.
+        self._berserk_cache = {}
+
+        # Bind frequently read state to locals so that each check below
+        # avoids repeated attribute lookups.
+        player = self.player
+        omen_proc = player.omen_proc
+        fight_length = self.fight_length
+        latency = self.latency
+        energy, cp = player.energy, player.combo_points
+        rip_cp = self._s_min_combos_for_rip
+        bite_cp = self._s_min_combos_for_bite
 
         # 10/6/21 - Added logic to not cast Rip if we're near the end of the
         # fight.
@@ -764,162 +1427,134 @@ class Simulation():
         # end_thresh = self.calc_allowed_rip_downtime(time)
         rip_now = (
             (cp >= rip_cp) and (not self.rip_debuff)
-            and (self.fight_length - time >= end_thresh)
-            and (not self.player.omen_proc)
+            and (fight_length - time >= end_thresh)
+            and (not omen_proc)
         )
         bite_at_end = (
             (cp >= bite_cp)
-            and ((self.fight_length - time < end_thresh) or (
+            and ((fight_length - time < end_thresh) or (
                     self.rip_debuff and
-                    (self.fight_length - self.rip_end < end_thresh)
+                    (fight_length - self.rip_end < end_thresh)
                 )
             )
         )
 
         mangle_now = (
             (not rip_now) and (not self.mangle_debuff)
-            # and (not self.player.omen_proc)
-        )
-        mangle_cost = self.player.mangle_cost
-
-        bite_before_rip = (
-            (cp >= bite_cp) and self.rip_debuff and self.player.savage_roar
-            and self.strategy['use_bite'] and self.can_bite(time)
-        )
-        bite_now = (
-            (bite_before_rip or bite_at_end)
-            and (not self.player.omen_proc)
+            # and (not omen_proc)
         )
+        mangle_cost = player.mangle_cost
 
         # During Berserk, we additionally add an Energy constraint on Bite
-        # usage to maximize the total Energy expenditure we can get.
-        if bite_now and self.player.berserk:
-            bite_now = (energy <= self.strategy['berserk_bite_thresh'])
+        # usage to maximize the total Energy expenditure we can get. The
+        # more expensive can_bite() check is deferred to the Bite branch of
+        # the decision tree below, so that it is only evaluated when no
+        # higher priority action has been chosen.
+        bite_allowed = (not omen_proc) and (
+            (not player.berserk) or (energy <= self._s_berserk_bite_thresh)
+        )
 
         rake_now = (
-            (self.strategy['use_rake']) and (not self.rake_debuff)
-            and (self.fight_length - time > 9)
-            and (not self.player.omen_proc)
+            (self._s_use_rake) and (not self.rake_debuff)
+            and (fight_length - time > 9)
+            and (not omen_proc)
         )
 
-        berserk_energy_thresh = 90 - 10 * self.player.omen_proc
         berserk_now = (
-            self.strategy['use_berserk'] and (self.player.berserk_cd < 1e-9)
-            and (self.player.tf_cd > 15 + 5 * self.player.berserk_glyph)
+            self._s_use_berserk and (player.berserk_cd < 1e-9)
+            and (player.tf_cd > 15 + 5 * player.berserk_glyph)
             # and (energy < berserk_energy_thresh + 1e-9)
         )
 
-        # roar_now = (not self.player.savage_roar) and (cp >= 1)
+        # roar_now = (not player.savage_roar) and (cp >= 1)
         # pool_for_roar = (not roar_now) and (cp >= 1) and self.clip_roar(time)
-        roar_now = (cp >= 1) and (
-            (not self.player.savage_roar) or self.clip_roar(time)
-        )
+        # As for Bite, the clip_roar() check is deferred to the Roar branch.
 
         # First figure out how much Energy we must float in order to be able
         # to refresh our buffs/debuffs as soon as they fall off
         pending_actions = []
         rip_refresh_pending = False
 
-        if self.rip_debuff and (self.rip_end < self.fight_length - end_thresh):
-            if self.berserk_expected_at(time, self.rip_end):
+        if self.rip_debuff and (self.rip_end < fight_length - end_thresh):
+            if self._berserk_at(time, self.rip_end):
                 rip_cost = 15
             else:
                 rip_cost = 30
 
             pending_actions.append((self.rip_end, rip_cost))
             rip_refresh_pending = True
-        if self.rake_debuff and (self.rake_end < self.fight_length - 9):
-            if self.berserk_expected_at(time, self.rake_end):
+        if self.rake_debuff and (self.rake_end < fight_length - 9):
+            if self._berserk_at(time, self.rake_end):
                 pending_actions.append((self.rake_end, 17.5))
             else:
                 pending_actions.append((self.rake_end, 35))
-        if self.mangle_debuff and (self.mangle_end < self.fight_length - 1):
-            base_cost = self.player._mangle_cost
-            if self.berserk_expected_at(time, self.mangle_end):
+        if self.mangle_debuff and (self.mangle_end < fight_length - 1):
+            base_cost = player._mangle_cost
+            if self._berserk_at(time, self.mangle_end):
                 pending_actions.append((self.mangle_end, 0.5 * base_cost))
             else:
                 pending_actions.append((self.mangle_end, base_cost))
-        if self.player.savage_roar:
-            if self.berserk_expected_at(time, self.roar_end):
+        if player.savage_roar:
+            if self._berserk_at(time, self.roar_end):
                 pending_actions.append((self.roar_end, 12.5))
             else:
                 pending_actions.append((self.roar_end, 25))
 
-        pending_actions.sort()
-
-        # Allow for bearweaving if the next pending action is >= 4.5s away
-        furor_cap = min(20 * self.player.furor, 85)
-        # weave_energy = min(furor_cap - 30 - 20 * self.latency, 42)
-        weave_energy = furor_cap - 30 - 20 * self.latency
-
-        if self.player.furor > 3:
-            weave_energy -= 15
-
-        weave_end = time + 4.5 + 2 * self.latency
-        bearweave_now = (
-            self.strategy['bearweave'] and (energy <= weave_energy)
-            and (not self.player.omen_proc) and
-            # ((not pending_actions) or (pending_actions[0][0] >= weave_end))
-            ((not rip_refresh_pending) or (self.rip_end >= weave_end))
-            # and (not self.tf_expected_before(time, weave_end))
-            # and (not self.params['tigers_fury'])
-            and (not self.player.berserk)
-        )
-
-        if bearweave_now and (not self.strategy['lacerate_prio']):
-            bearweave_now = not self.tf_expected_before(time, weave_end)
-
-        # If we're maintaining Lacerate, then allow for emergency bearweaves
-        # if Lacerate is about to fall off even if the above conditions do not
-        # apply.
-        emergency_bearweave = (
-            self.strategy['bearweave'] and self.strategy['lacerate_prio']
-            and self.lacerate_debuff
-            and (self.lacerate_end - time < 2.5 + self.latency)
-            and (self.lacerate_end < self.fight_length)
-        )
-
-        floating_energy = 0
-        previous_time = time
-        #tf_pending = False
-
-        for refresh_time, refresh_cost in pending_actions:
-            delta_t = refresh_time - previous_time
-
-            # if (not tf_pending):
-            #     tf_pending = self.tf_expected_before(time, refresh_time)
+        # Allow for bearweaving if the next pending action is >= 4.5s away.
+        # The strategy flags are fixed for the whole fight, so the weave
+        # checks are skipped entirely for pure cat rotations.
+        furor_cap = self._furor_cap
+
+        if self._s_bearweave:
+            weave_energy = self._weave_energy
+            weave_end = time + 4.5 + 2 * latency
+            bearweave_now = (
+                (energy <= weave_energy)
+                and (not omen_proc) and
+                # ((not pending_actions)
+                #  or (pending_actions[0][0] >= weave_end))
+                ((not rip_refresh_pending) or (self.rip_end >= weave_end))
+                # and (not self.tf_expected_before(time, weave_end))
+                # and (not self.params['tigers_fury'])
+                and (not player.berserk)
+            )
 
-            #     if tf_pending:
-            #         refresh_cost -= 60
+            if bearweave_now and (not self._s_lacerate_prio):
+                bearweave_now = not self.tf_expected_before(time, weave_end)
 
-            if delta_t < refresh_cost / 10.:
-                floating_energy += refresh_cost - 10 * delta_t
-                previous_time = refresh_time
-            else:
-                previous_time += refresh_cost / 10.
+            # If we're maintaining Lacerate, then allow for emergency
+            # bearweaves if Lacerate is about to fall off even if the above
+            # conditions do not apply.
+            emergency_bearweave = (
+                self._s_lacerate_prio and self.lacerate_debuff
+                and (self.lacerate_end - time < 2.5 + latency)
+                and (self.lacerate_end < fight_length)
+            )
+        else:
+            bearweave_now = False
+            emergency_bearweave = False
 
-        excess_e = energy - floating_energy
         time_to_next_action = 0.0
 
-        if not self.player.cat_form:
+        if not player.cat_form:
             # Shift back into Cat Form if (a) our first bear auto procced
             # Clearcasting, or (b) our first bear auto didn't generate enough
             # Rage to Mangle or Maul, or (c) we don't have enough time or
             # Energy leeway to spend an additional GCD in Dire Bear Form.
             shift_now = (
-                (energy + 15 + 10 * self.latency > furor_cap)
+                (energy + 15 + 10 * latency > furor_cap)
                 or (rip_refresh_pending and (self.rip_end < time + 3.0))
             )
             shift_next = (
-                (energy + 30 + 10 * self.latency > furor_cap)
+                (energy + 30 + 10 * latency > furor_cap)
                 or (rip_refresh_pending and (self.rip_end < time + 4.5))
             )
 
-            if self.strategy['powerbear']:
-                powerbear_now = (not shift_now) and (self.player.rage < 10)
+            if self._s_powerbear:
+                powerbear_now = (not shift_now) and (player.rage < 10)
             else:
                 powerbear_now = False
-                shift_now = shift_now or (self.player.rage < 10)
+                shift_now = shift_now or (player.rage < 10)
 
             # lacerate_now = self.strategy['lacerate_prio'] and (
             #     (not self.lacerate_debuff) or (self.lacerate_stacks < 5)
@@ -929,49 +1564,51 @@ class Simulation():
                 (not self.lacerate_debuff) or (self.lacerate_stacks < 5)
             )
             maintain_lacerate = (not build_lacerate) and (
-                (self.lacerate_end - time <= self.strategy['lacerate_time'])
-                and ((self.player.rage < 38) or shift_next)
-                and (self.lacerate_end < self.fight_length)
+                (self.lacerate_end - time <= self._s_lacerate_time)
+                and ((player.rage < 38) or shift_next)
+                and (self.lacerate_end < fight_length)
             )
             lacerate_now = (
-                self.strategy['lacerate_prio']
+                self._s_lacerate_prio
                 and (build_lacerate or maintain_lacerate)
             )
             emergency_lacerate = (
-                self.strategy['lacerate_prio'] and self.lacerate_debuff
-                and (self.lacerate_end - time < 3.0 + 2 * self.latency)
-                and (self.lacerate_end < self.fight_length)
+                self._s_lacerate_prio and self.lacerate_debuff
+                and (self.lacerate_end - time < 3.0 + 2 * latency)
+                and (self.lacerate_end < fight_length)
             )
 
-            if (not self.strategy['lacerate_prio']) or (not lacerate_now):
-                shift_now = shift_now or self.player.omen_proc
+            if (not self._s_lacerate_prio) or (not lacerate_now):
+                shift_now = shift_now or omen_proc
 
-            if emergency_lacerate and (self.player.rage >= 13):
+            if emergency_lacerate and (player.rage >= 13):
                 return self.lacerate(time)
             elif shift_now:
-                self.player.ready_to_shift = True
+                player.ready_to_shift = True
             elif powerbear_now:
-                self.player.shift(time, powershift=True)
-            elif lacerate_now and (self.player.rage >= 13):
+                player.shift(time, powershift=True)
+            elif lacerate_now and (player.rage >= 13):
                 return self.lacerate(time)
-            elif (self.player.rage >= 15) and (self.player.mangle_cd < 1e-9):
+            elif (player.rage >= 15) and (player.mangle_cd < 1e-9):
                 return self.mangle(time)
-            elif self.player.rage >= 13:
+            elif player.rage >= 13:
                 return self.lacerate(time)
             else:
-                time_to_next_action = self.swing_times[0] - time
+                time_to_next_action = self.next_swing - time
         elif emergency_bearweave:
-            self.player.ready_to_shift = True
+            player.ready_to_shift = True
         elif berserk_now:
             self.apply_berserk(time)
             return 0.0
-        elif roar_now: # or pool_for_roar:
+        elif (cp >= 1) and (
+            (not player.savage_roar) or self.clip_roar(time)
+        ): # or pool_for_roar:
             # If we have leeway to do so, don't Roar right away and instead
             # pool Energy to reduce how much we clip the buff
             # if pool_for_roar:
             #     roar_now = (
             #         (self.roar_end - time <= self.strategy['max_roar_clip'])
-            #         or self.player.omen_proc or (energy >= 90)
+            #         or omen_proc or (energy >= 90)
             #     )
 
             # if not roar_now:
@@ -979,51 +1616,62 @@ class Simulation():
             #         self.roar_end - self.strategy['max_roar_clip'] - time,
             #         (90. - energy) / 10.
             #     )
-            if energy >= self.player.roar_cost:
-                self.roar_end = self.player.roar(time)
+            if energy >= player.roar_cost:
+                self.roar_end = player.roar(time)
+                self.schedule_expiration(EVT_ROAR_END, self.roar_end)
                 return 0.0
             else:
-                time_to_next_action = (self.player.roar_cost - energy) / 10.
+                time_to_next_action = (player.roar_cost - energy) / 10.
         elif rip_now:
-            if (energy >= self.player.rip_cost) or self.player.omen_proc:
+            if (energy >= player.rip_cost) or omen_proc:
                 return self.rip(time)
-            time_to_next_action = (self.player.rip_cost - energy) / 10.
-        elif bite_now:
-            if energy >= self.player.bite_cost:
-                return self.player.bite()
-            time_to_next_action = (self.player.bite_cost - energy) / 10.
+            time_to_next_action = (player.rip_cost - energy) / 10.
+        elif bite_allowed and (bite_at_end or (
+            (cp >= bite_cp) and self.rip_debuff and player.savage_roar
+            and self._s_use_bite and self.can_bite(time)
+        )):
+            if energy >= player.bite_cost:
+                return player.bite()
+            time_to_next_action = (player.bite_cost - energy) / 10.
         elif rake_now:
-            if (energy >= self.player.rake_cost) or self.player.omen_proc:
+            if (energy >= player.rake_cost) or omen_proc:
                 return self.rake(time)
-            time_to_next_action = (self.player.rake_cost - energy) / 10.
+            time_to_next_action = (player.rake_cost - energy) / 10.
         elif mangle_now:
-            if (energy >= mangle_cost) or self.player.omen_proc:
+            if (energy >= mangle_cost) or omen_proc:
                 return self.mangle(time)
             time_to_next_action = (mangle_cost - energy) / 10.
         elif bearweave_now:
-            self.player.ready_to_shift = True
-        elif self.strategy['mangle_spam'] and (not self.player.omen_proc):
+            player.ready_to_shift = True
+        elif self._s_mangle_spam and (not omen_proc):
+            excess_e = energy - _calc_floating_energy(time, pending_actions)
+
             if excess_e >= mangle_cost:
                 return self.mangle(time)
             time_to_next_action = (mangle_cost - excess_e) / 10.
         else:
-            if (excess_e >= self.player.shred_cost) or self.player.omen_proc:
+            excess_e = energy - _calc_floating_energy(time, pending_actions)
+
+            if (excess_e >= player.shred_cost) or omen_proc:
                 return self.shred()
-            time_to_next_action = (self.player.shred_cost - excess_e) / 10.
+            time_to_next_action = (player.shred_cost - excess_e) / 10.
 
         # Model in latency when waiting on Energy for our next action
         next_action = time + time_to_next_action
 
         if pending_actions:
-            next_action = min(next_action, pending_actions[0][0])
+            next_action = min(next_action, min(pending_actions)[0])
 
-        self.next_action = next_action + self.latency
+        self.next_action = next_action + latency
 
         return 0.0
 
     def update_swing_times(self, time, new_swing_timer, first_swing=False):
-        """Generate an updated list of swing times after changes to the swing
-        timer have occurred.
+        """Generate an updated schedule of swing times after changes to the
+        swing timer have occurred. Rather than storing the full list of future
+        swings, the schedule is represented by its start time, spacing, and a
+        cursor counting the swings taken so far, with the upcoming swing time
+        kept in self.next_swing.
 
         Arguments:
             time (float): Simulation time at which swing timer is changing, in
@@ -1036,21 +1684,30 @@ class Simulation():
         if first_swing:
             start_time = time
         else:
-            frac_remaining = (self.swing_times[0] - time) / self.swing_timer
+            frac_remaining = (self.next_swing - time) / self.swing_timer
             start_time = time + frac_remaining * new_swing_timer
 
         # Now update the internal swing times
         self.swing_timer = new_swing_timer
 
         if start_time > self.fight_length - self.swing_timer:
-            self.swing_times = [
-                start_time, start_time + self.swing_timer
-            ]
+            self._swing_delta = self.swing_timer
         else:
-            self.swing_times = list(np.arange(
-                start_time, self.fight_length + self.swing_timer,
-                self.swing_timer
-            ))
+            # The spacing mirrors that of np.arange(start_time, fight_length
+            # + swing_timer, swing_timer), so that swing times are identical
+            # to those of an explicitly generated schedule.
+            self._swing_delta = (start_time + self.swing_timer) - start_time
+
+        self._swing_start = start_time
+        self._swing_idx = 0
+        self.next_swing = start_time
+
+    def advance_swing(self):
+        """Move the swing schedule cursor past the swing that just happened."""
+        self._swing_idx += 1
+        self.next_swing = (
+            self._swing_start + self._swing_idx * self._swing_delta
+        )
 
     def apply_haste_buff(self, time, haste_rating_increment):
         """Perform associated bookkeeping when the player Haste Rating is
@@ -1061,12 +1718,13 @@ class Simulation():
             haste_rating_increment (int): Amount by which the player Haste
                 Rating changes.
         """
-        new_swing_timer = sim_utils.calc_swing_timer(
-            sim_utils.calc_haste_rating(
-                self.swing_timer, multiplier=self.haste_multiplier,
-                cat_form=self.player.cat_form
-            ) + haste_rating_increment,
-            multiplier=self.haste_multiplier, cat_form=self.player.cat_form
+        # Adding Haste Rating to the rating implied by the current swing
+        # timer (see sim_utils.calc_haste_rating() and calc_swing_timer())
+        # simplifies to the closed form below, which avoids the round trip.
+        base_timer = 1.0 if self.player.cat_form else 2.5
+        new_swing_timer = self.swing_timer / (
+            1 + haste_rating_increment * self.haste_multiplier
+            * self.swing_timer / (2521 * base_timer)
         )
         self.update_swing_times(time, new_swing_timer)
 
@@ -1081,10 +1739,10 @@ class Simulation():
         self.params['tigers_fury'] = True
         self.player.calc_damage_params(**self.params)
         self.tf_end = time + 6.
+        self.schedule_expiration(EVT_TF_END, self.tf_end)
         self.player.tf_cd = 30.
         self.next_action = time + self.latency
-        self.proc_end_times.append(time + 30.)
-        self.proc_end_times.sort()
+        self.schedule_proc_end(time + 30.)
 
         if self.log:
             self.combat_log.append(
@@ -1100,6 +1758,7 @@ class Simulation():
         """
         self.params['tigers_fury'] = False
         self.player.calc_damage_params(**self.params)
+        self.cancel_events(EVT_TF_END)
 
         if self.log:
             self.combat_log.append(
@@ -1119,6 +1778,7 @@ class Simulation():
         self.player.set_ability_costs()
         self.player.gcd = 1.0 * (not prepop)
         self.berserk_end = time + 15. + 5 * self.player.berserk_glyph
+        self.schedule_expiration(EVT_BERSERK_END, self.berserk_end)
         self.player.berserk_cd = 180. - prepop
 
         if self.log:
@@ -1138,6 +1798,7 @@ class Simulation():
         """
         self.player.berserk = False
         self.player.set_ability_costs()
+        self.cancel_events(EVT_BERSERK_END)
 
         if self.log:
             self.combat_log.append(
@@ -1165,16 +1826,24 @@ class Simulation():
         """
         tick_damage = base_tick_damage * (1 + 0.3 * self.mangle_debuff)
 
+        # Bleed ticks cannot miss and have no damage range, so only a crit
+        # roll is needed. These are drawn from the pool pre-rolled in run(),
+        # falling back on a fresh draw if the pool is ever exhausted.
         if (crit_chance > 0) and self.player.primal_gore:
-            tick_damage, _, _ = sim_utils.calc_yellow_damage(
-                tick_damage, tick_damage, 0.0, crit_chance,
-                crit_multiplier=self.player.calc_crit_multiplier()
-            )
+            try:
+                crit_roll = self._bleed_crit_rolls[self._bleed_roll_idx]
+            except IndexError:
+                crit_roll = sim_utils.rng.random()
+
+            self._bleed_roll_idx += 1
+
+            if crit_roll < crit_chance:
+                tick_damage *= self.player.calc_crit_multiplier()
 
         self.player.dmg_breakdown[ability_name]['damage'] += tick_damage
 
         if sr_snapshot:
-            self.player.dmg_breakdown['Savage Roar']['damage'] += (
+            self.player._roar_breakdown['damage'] += (
                 self.player.roar_fac * tick_damage
             )
             tick_damage *= 1 + self.player.roar_fac
@@ -1193,17 +1862,23 @@ class Simulation():
 
         return tick_damage
 
-    def run(self, log=False):
+    def run(self, log=False, history=True):
         """Run a simulated trajectory for the fight.
 
         Arguments:
             log (bool): If True, generate a full combat log of events within
                 the simulation. Defaults False.
+            history (bool): If True, record the time, damage, energy and combo
+                points at each simulated event. If False, only the total
+                damage done is tracked (in the total_damage attribute) and
+                None is returned for each of the four histories. Defaults
+                True.
 
         Returns:
             times, damage, energy, combos: Lists of the time,
                 total damage done, player energy, and player combo points at
-                each simulated event within the fight duration.
+                each simulated event within the fight duration. None if
+                history == False.
             damage_breakdown (collection.OrderedDict): Dictionary containing a
                 breakdown of the number of casts and damage done by each player
                 ability.
@@ -1223,6 +1898,15 @@ class Simulation():
         self.params['tigers_fury'] = False
         self.next_action = 0.0
 
+        # Clear out any events that were still queued from a previous run, and
+        # remove the delayed armor debuffs
+        self.event_heap = []
+        self.expiration_heap = []
+        self.event_generations = [0] * NUM_EVENT_TYPES
+        self.debuff_controller.reset()
+        self._berserk_cache = {}
+        self._cache_player_constants()
+
         # Configure combat logging if requested
         self.log = log
 
@@ -1235,295 +1919,236 @@ class Simulation():
         # Same thing for swing times, except that the first swing will occur at
         # most 100 ms after the first special just to simulate some latency and
         # avoid errors from Omen procs on the first swing.
-        swing_timer_start = 0.1 * np.random.rand()
+        swing_timer_start = 0.1 * sim_utils.rng.random()
         self.update_swing_times(
             swing_timer_start, self.player.swing_timer, first_swing=True
         )
 
         # Reset all trinkets to fresh state
-        self.proc_end_times = []
-
         for trinket in self.trinkets:
             trinket.reset()
 
         # If a bear tank is providing Mangle uptime for us, then flag the
         # debuff as permanently on.
-        if self.strategy['bear_mangle']:
+        if self._s_bear_mangle:
             self.mangle_debuff = True
-            self.mangle_end = np.inf
+            self.mangle_end = math.inf
 
         # Pre-pop Berserk if requested
-        if self.strategy['use_berserk'] and self.strategy['prepop_berserk']:
+        if self._s_use_berserk and self._s_prepop_berserk:
             self.apply_berserk(-1.0, prepop=True)
 
         # Pre-proc Clearcasting if requested
-        if self.strategy['preproc_omen'] and self.player.omen:
+        if self._s_preproc_omen and self.player.omen:
             self.player.omen_proc = True
 
         # Create placeholder for time to OOM if the player goes OOM in the run
         self.time_to_oom = None
 
         # Create empty lists of output variables
-        times = []
-        damage = []
-        energy = []
-        combos = []
+        if history:
+            times = []
+            damage = []
+            energy = []
+            combos = []
+        else:
+            times = damage = energy = combos = None
+
+        total_damage = 0.0
 
         # Run simulation
         time = 0.0
         previous_time = 0.0
         num_hot_ticks = 0
 
-        while time <= self.fight_length:
+        # Pre-roll all of the Revitalize procs for the fight in a single
+        # vectorized draw rather than one RNG call per HoT tick
+        max_hot_ticks = int(self.fight_length / self.revitalize_frequency) + 2
+        revitalize_procs = (
+            sim_utils.rng.random(max_hot_ticks) < 0.15
+        ).tolist()
+
+        # Similarly pre-roll the crit rolls for Rip and Lacerate ticks, which
+        # can tick at most every 2 and 3 seconds respectively.
+        if self.player.primal_gore:
+            max_bleed_ticks = (
+                int(self.fight_length / 2) + int(self.fight_length / 3) + 2
+            )
+            self._bleed_crit_rolls = sim_utils.rng.random(
+                max_bleed_ticks
+            ).tolist()
+        else:
+            self._bleed_crit_rolls = []
+
+        self._bleed_roll_idx = 0
+
+        # The player, event heap and event generations are mutated in place
+        # for the rest of the fight, so bind them and the other per-step
+        # lookups to locals.
+        player = self.player
+        fight_length = self.fight_length
+        event_heap = self.event_heap
+        expiration_heap = self.expiration_heap
+        event_generations = self.event_generations
+        heappop = heapq.heappop
+        update_debuffs = self.debuff_controller.update
+        debuffs_pending = True
+
+        if history:
+            times_append = times.append
+            damage_append = damage.append
+            energy_append = energy.append
+            combos_append = combos.append
+
+        while time <= fight_length:
             # Update player Mana and Energy based on elapsed simulation time
             delta_t = time - previous_time
-            self.player.regen(delta_t)
+            player.regen(delta_t)
 
             # Tabulate all damage sources in this timestep
             dmg_done = 0.0
 
-            # Decrement cooldowns by time since last event
-            self.player.gcd = max(0.0, self.player.gcd - delta_t)
-            self.player.omen_icd = max(0.0, self.player.omen_icd - delta_t)
-            self.player.rune_cd = max(0.0, self.player.rune_cd - delta_t)
-            self.player.tf_cd = max(0.0, self.player.tf_cd - delta_t)
-            self.player.berserk_cd = max(0.0, self.player.berserk_cd - delta_t)
-            self.player.enrage_cd = max(0.0, self.player.enrage_cd - delta_t)
-            self.player.mangle_cd = max(0.0, self.player.mangle_cd - delta_t)
-
-            if (self.player.five_second_rule
-                    and (time - self.player.last_shift >= 5)):
-                self.player.five_second_rule = False
-
-            # Check if Tiger's Fury fell off
-            if self.params['tigers_fury'] and (time >= self.tf_end):
-                self.drop_tigers_fury(self.tf_end)
-
-            # Check if Berserk fell off
-            if self.player.berserk and (time >= self.berserk_end):
-                self.drop_berserk(self.berserk_end)
-
-            # Check if Mangle fell off
-            if self.mangle_debuff and (time >= self.mangle_end):
-                self.mangle_debuff = False
-
-                if self.log:
-                    self.combat_log.append(
-                        self.gen_log(self.mangle_end, 'Mangle', 'falls off')
-                    )
-
-            # Check if Savage Roar fell off
-            if self.player.savage_roar and (time >= self.roar_end):
-                self.player.savage_roar = False
-
-                if log:
-                    self.combat_log.append(
-                        self.gen_log(self.roar_end, 'Savage Roar', 'falls off')
-                    )
-
-            # Check if a Rip tick happens at this time
-            if self.rip_debuff and (time >= self.rip_ticks[0]):
-                dmg_done += self.apply_bleed_damage(
-                    self.rip_damage, self.rip_crit_chance, 'Rip',
-                    self.rip_sr_snapshot, time
-                )
-                self.rip_ticks.pop(0)
-
-            # Check if Rip fell off
-            if self.rip_debuff and (time > self.rip_end - 1e-9):
-                self.rip_debuff = False
-
-                if self.log:
-                    self.combat_log.append(
-                        self.gen_log(self.rip_end, 'Rip', 'falls off')
-                    )
-
-            # Check if a Rake tick happens at this time
-            if self.rake_debuff and (time >= self.rake_ticks[0]):
-                dmg_done += self.apply_bleed_damage(
-                    self.rake_damage, 0, 'Rake', self.rake_sr_snapshot, time
-                )
-                self.rake_ticks.pop(0)
-
-            # Check if Rake fell off
-            if self.rake_debuff and (time > self.rake_end - 1e-9):
-                self.rake_debuff = False
-
-                if self.log:
-                    self.combat_log.append(
-                        self.gen_log(self.rake_end, 'Rake', 'falls off')
-                    )
-
-            # Check if a Lacerate tick happens at this time
-            if (self.lacerate_debuff and self.lacerate_ticks
-                    and (time >= self.lacerate_ticks[0])):
-                self.last_lacerate_tick = time
-                dmg_done += self.apply_bleed_damage(
-                    self.lacerate_damage, self.lacerate_crit_chance,
-                    'Lacerate', False, time
-                )
-                self.lacerate_ticks.pop(0)
-
-            # Check if Lacerate fell off
-            if self.lacerate_debuff and (time > self.lacerate_end - 1e-9):
-                self.lacerate_debuff = False
-
-                if self.log:
-                    self.combat_log.append(self.gen_log(
-                        self.lacerate_end, 'Lacerate', 'falls off'
-                    ))
+            # Decrement cooldowns by time since last event. Most cooldowns sit
+            # at zero for much of the fight, and several events often share a
+            # timestamp, so only touch the ones that are actually running.
+            if delta_t > 0:
+                if player.gcd > 0:
+                    player.gcd = max(0.0, player.gcd - delta_t)
+                if player.omen_icd > 0:
+                    player.omen_icd = max(0.0, player.omen_icd - delta_t)
+                if player.rune_cd > 0:
+                    player.rune_cd = max(0.0, player.rune_cd - delta_t)
+                if player.tf_cd > 0:
+                    player.tf_cd = max(0.0, player.tf_cd - delta_t)
+                if player.berserk_cd > 0:
+                    player.berserk_cd = max(0.0, player.berserk_cd - delta_t)
+                if player.enrage_cd > 0:
+                    player.enrage_cd = max(0.0, player.enrage_cd - delta_t)
+                if player.mangle_cd > 0:
+                    player.mangle_cd = max(0.0, player.mangle_cd - delta_t)
+
+            if (player.five_second_rule
+                    and (time - player.last_shift >= 5)):
+                player.five_second_rule = False
+
+            # Process all bleed ticks, aura expirations and other events that
+            # happen at this time
+            if ((event_heap and (event_heap[0][0] <= time))
+                    or (expiration_heap
+                        and (expiration_heap[0][0] <= time + 1e-9))):
+                dmg_done += self.process_events(time)
 
             # Roll for Revitalize procs at the pre-calculated frequency
             if time >= self.revitalize_frequency * (num_hot_ticks + 1):
                 num_hot_ticks += 1
 
-                if np.random.rand() < 0.15:
-                    if self.player.cat_form:
-                        self.player.energy = min(100, self.player.energy + 8)
+                if revitalize_procs[num_hot_ticks - 1]:
+                    if player.cat_form:
+                        player.energy = min(100, player.energy + 8)
                     else:
-                        self.player.rage = min(100, self.player.rage + 4)
+                        player.rage = min(100, player.rage + 4)
 
-                    if self.log:
+                    if log:
                         self.combat_log.append(
                             self.gen_log(time, 'Revitalize', 'applied')
                         )
 
-            # Activate or deactivate trinkets if appropriate
+            # Activate or deactivate trinkets if appropriate, and apply any
+            # armor debuff stacks that have come due. The debuff controller
+            # stops being polled once its last stack is on.
             for trinket in self.trinkets:
-                dmg_done += trinket.update(time, self.player, self)
+                dmg_done += trinket.update(time, player, self)
+
+            if debuffs_pending:
+                debuffs_pending = update_debuffs(time, player, self)
 
             # Use Enrage if appropriate
-            if ((not self.player.cat_form) and (self.player.enrage_cd < 1e-9)
-                    and (time < self.player.last_shift + 1.5 + 1e-9)):
-                self.player.rage = min(100, self.player.rage + 20)
-                self.player.enrage = True
-                self.player.enrage_cd = 60.
+            if ((not player.cat_form) and (player.enrage_cd < 1e-9)
+                    and (time < player.last_shift + 1.5 + 1e-9)):
+                player.rage = min(100, player.rage + 20)
+                player.enrage = True
+                player.enrage_cd = 60.
 
-                if self.log:
+                if log:
                     self.combat_log.append(
                         self.gen_log(time, 'Enrage', 'applied')
                     )
 
-            # Check if a melee swing happens at this time
-            if time == self.swing_times[0]:
-                if self.player.cat_form:
-                    dmg_done += self.player.swing()
-                else:
-                    # If we will have enough time and Energy leeway to stay in
-                    # Dire Bear Form once the GCD expires, then only Maul if we
-                    # will be left with enough Rage to cast Mangle or Lacerate
-                    # on that global.
-                    furor_cap = min(20 * self.player.furor, 85)
-                    rip_refresh_pending = (
-                        self.rip_debuff
-                        and (self.rip_end < self.fight_length - 10)
-                    )
-                    energy_leeway = (
-                        furor_cap - 15
-                        - 10 * (self.player.gcd + self.latency)
-                    )
-                    shift_next = (self.player.energy > energy_leeway)
+            # Trinket procs can only be triggered by a melee swing or an
+            # ability cast, so keep track of whether either one happens at
+            # this time.
+            player_acted = False
 
-                    if rip_refresh_pending:
-                        shift_next = shift_next or (
-                            self.rip_end < time + self.player.gcd + 3.0
-                        )
+            # Check if a melee swing happens at this time
+            if time == self.next_swing:
+                player_acted = True
 
-                    if self.strategy['lacerate_prio']:
-                        lacerate_leeway = (
-                            self.player.gcd + self.strategy['lacerate_time']
-                        )
-                        lacerate_next = (
-                            (not self.lacerate_debuff)
-                            or (self.lacerate_stacks < 5)
-                            or (self.lacerate_end - time <= lacerate_leeway)
-                        )
-                        emergency_leeway = (
-                            self.player.gcd + 3.0 + 2 * self.latency
-                        )
-                        emergency_lacerate_next = (
-                            self.lacerate_debuff and
-                            (self.lacerate_end - time <= emergency_leeway)
-                        )
-                        mangle_next = (not lacerate_next) and (
-                            (not self.mangle_debuff)
-                            or (self.mangle_end < time + self.player.gcd + 3.0)
-                        )
-                    else:
-                        mangle_next = (self.player.mangle_cd < self.player.gcd)
-                        lacerate_next = self.lacerate_debuff and (
-                            (self.lacerate_stacks < 5) or
-                            (self.lacerate_end < time + self.player.gcd + 4.5)
-                        )
-                        emergency_lacerate_next = False
-
-                    if emergency_lacerate_next:
-                        maul_rage_thresh = 23
-                    elif shift_next:
-                        maul_rage_thresh = 10
-                    elif mangle_next:
-                        maul_rage_thresh = 25
-                    elif lacerate_next:
-                        maul_rage_thresh = 23
-                    else:
-                        maul_rage_thresh = 10
+                if player.cat_form:
+                    dmg_done += player.swing()
+                else:
+                    # Only Maul if we will be left with enough Rage to cast
+                    # the special we want on the next global.
+                    maul_rage_thresh = self.calc_maul_rage_threshold(time)
 
-                    if self.player.rage >= maul_rage_thresh:
-                        dmg_done += self.player.maul(self.mangle_debuff)
+                    if player.rage >= maul_rage_thresh:
+                        dmg_done += player.maul(self.mangle_debuff)
                     else:
-                        dmg_done += self.player.swing()
+                        dmg_done += player.swing()
 
-                self.swing_times.pop(0)
+                self.advance_swing()
 
-                if self.log:
+                if log:
                     self.combat_log.append(
-                        ['%.3f' % time] + self.player.combat_log
+                        ['%.3f' % time] + player.combat_log
                     )
 
                 # If the swing/Maul resulted in an Omen proc, then schedule the
                 # next player decision based on latency.
-                if self.player.omen_proc:
+                if player.omen_proc:
                     self.next_action = time + self.latency
 
             # Check if we're able to act, and if so execute the optimal cast.
-            self.player.combat_log = None
+            if (player.gcd < 1e-9) and (time >= self.next_action):
+                if log:
+                    player.combat_log = None
 
-            if (self.player.gcd < 1e-9) and (time >= self.next_action):
                 dmg_done += self.execute_rotation(time)
+                player_acted = True
 
-            # Append player's log to running combat log
-            if self.log and self.player.combat_log:
-                self.combat_log.append(
-                    ['%.3f' % time] + self.player.combat_log
-                )
+                # Append player's log to running combat log
+                if log and player.combat_log:
+                    self.combat_log.append(
+                        ['%.3f' % time] + player.combat_log
+                    )
 
             # If we entered Dire Bear Form, Tiger's Fury fell off
-            if self.params['tigers_fury'] and (self.player.gcd == 1.5):
+            if self.params['tigers_fury'] and (player.gcd == 1.5):
                 self.drop_tigers_fury(time)
 
-            # If a trinket proc occurred from a swing or special, apply it
-            for trinket in self.trinkets:
-                dmg_done += trinket.update(time, self.player, self)
+            # If a trinket proc occurred from a swing or special, apply it.
+            # Otherwise the trinkets were already brought up to date above.
+            if player_acted:
+                for trinket in self.trinkets:
+                    dmg_done += trinket.update(time, player, self)
 
-            # If a proc ended at this timestep, remove it from the list
-            if self.proc_end_times and (time == self.proc_end_times[0]):
-                self.proc_end_times.pop(0)
+            if debuffs_pending:
+                debuffs_pending = update_debuffs(time, player, self)
 
             # If our Energy just dropped low enough, then cast Tiger's Fury
             #tf_energy_thresh = 30
-            leeway_time = max(self.player.gcd, self.latency)
-            tf_energy_thresh = 40 - 10 * (leeway_time + self.player.omen_proc)
+            leeway_time = max(player.gcd, self.latency)
+            tf_energy_thresh = 40 - 10 * (leeway_time + player.omen_proc)
             tf_now = (
-                (self.player.energy < tf_energy_thresh)
-                and (self.player.tf_cd < 1e-9) and (not self.player.berserk)
-                and self.player.cat_form
+                (player.energy < tf_energy_thresh)
+                and (player.tf_cd < 1e-9) and (not player.berserk)
+                and player.cat_form
             )
 
             if tf_now:
                 # If Berserk is available, then pool to 30 Energy before
                 # casting TF to maximize Berserk efficiency.
-                # if self.player.berserk_cd <= leeway_time:
-                #     delta_e = tf_energy_thresh - 10 - self.player.energy
+                # if player.berserk_cd <= leeway_time:
+                #     delta_e = tf_energy_thresh - 10 - player.energy
 
                 #     if delta_e < 1e-9:
                 #         self.apply_tigers_fury(time)
@@ -1534,25 +2159,30 @@ class Simulation():
                 self.apply_tigers_fury(time)
 
             # Log current parameters
-            times.append(time)
-            damage.append(dmg_done)
-            energy.append(self.player.energy)
-            combos.append(self.player.combo_points)
-
-            # Update time
+            total_damage += dmg_done
+
+            if history:
+                times_append(time)
+                damage_append(dmg_done)
+                energy_append(player.energy)
+                combos_append(player.combo_points)
+
+            # Discard stale events first so that they do not create spurious
+            # time steps
+            while (event_heap and (event_heap[0][2]
+                    != event_generations[event_heap[0][1]])):
+                heappop(event_heap)
+
+            # Update time to the earliest of the next player action, melee
+            # swing, or queued event
             previous_time = time
-            next_swing = self.swing_times[0]
-            next_action = max(time + self.player.gcd, self.next_action)
-            time = min(next_action, next_swing)
-
-            if self.rip_debuff:
-                time = min(time, self.rip_ticks[0])
-            if self.rake_debuff:
-                time = min(time, self.rake_ticks[0])
-            if self.lacerate_debuff and self.lacerate_ticks:
-                time = min(time, self.lacerate_ticks[0])
-            if self.proc_end_times:
-                time = min(time, self.proc_end_times[0])
+            time = min(
+                max(time + player.gcd, self.next_action),
+                self.next_swing,
+                event_heap[0][0] if event_heap else math.inf
+            )
+
+        self.total_damage = total_damage
 
         # Perform a final update on trinkets at the exact fight end for
         # accurate uptime calculations. Manually deactivate any trinkets that
@@ -1562,17 +2192,12 @@ class Simulation():
         for trinket in self.trinkets:
             trinket.update(self.fight_length, self.player, self)
 
-            try:
-                if trinket.active:
-                    trinket.deactivate(
-                        self.player, self, time=self.fight_length
-                    )
+            if trinket.active:
+                trinket.deactivate(self.player, self, time=self.fight_length)
 
-                aura_stats.append(
-                    [trinket.proc_name, trinket.num_procs, trinket.uptime]
-                )
-            except AttributeError:
-                pass
+            aura_stats.append(
+                [trinket.proc_name, trinket.num_procs, trinket.uptime]
+            )
 
         output = (
             times, damage, energy, combos, self.player.dmg_breakdown,
@@ -1584,10 +2209,18 @@ class Simulation():
 
         return output
 
-    def iterate(self, *args):
+    def iterate(self, *args, seed=None, length_offset=None):
         """Perform one iteration of a multi-replicate calculation with a
         randomized fight length.
 
+        Arguments:
+            seed (int): If provided, seed the random number generator with
+                this value so that the iteration can be reproduced. Defaults
+                to drawing a fresh seed.
+            length_offset (float): If provided, offset in seconds of the fight
+                length from the nominal value. Defaults to drawing the offset
+                from a standard normal distribution.
+
         Returns:
             avg_dps (float): Average DPS on this iteration.
             dmg_breakdown (dict): Breakdown of cast count and damage done by
@@ -1601,18 +2234,22 @@ class Simulation():
         # Since we're getting the same snapshot of the Simulation object
         # when multiple iterations are run in parallel, we need to generate a
         # new random seed.
-        np.random.seed()
+        sim_utils.reseed(seed)
 
         # Randomize fight length to avoid haste clipping effects. We will
         # use a normal distribution centered around the target length, with
         # a standard deviation of 1 second (unhasted swing timer). Impact
         # of the choice of distribution needs to be assessed...
         base_fight_length = self.fight_length
-        randomized_fight_length = base_fight_length + np.random.randn()
+
+        if length_offset is None:
+            length_offset = sim_utils.rng.standard_normal()
+
+        randomized_fight_length = base_fight_length + length_offset
         self.fight_length = randomized_fight_length
 
-        _, damage, _, _, dmg_breakdown, aura_stats = self.run()
-        avg_dps = np.sum(damage) / self.fight_length
+        _, _, _, _, dmg_breakdown, aura_stats = self.run(history=False)
+        avg_dps = self.total_damage / self.fight_length
         self.fight_length = base_fight_length
 
         if self.time_to_oom is None:
@@ -1622,7 +2259,28 @@ class Simulation():
 
         return avg_dps, dmg_breakdown, aura_stats, oom_time
 
-    def run_replicates(self, num_replicates, detailed_output=False):
+    def iterate_dps(self, *args, seed=None, length_offset=None):
+        """Perform one iteration of a multi-replicate calculation with a
+        randomized fight length, returning only the DPS. Used when detailed
+        statistics are not requested, so that the per-ability breakdowns do
+        not have to be sent back from the worker processes.
+
+        Arguments:
+            seed (int): If provided, seed the random number generator with
+                this value. Defaults to drawing a fresh seed.
+            length_offset (float): If provided, offset in seconds of the fight
+                length from the nominal value. Defaults to a random draw.
+
+        Returns:
+            avg_dps (float): Average DPS on this iteration.
+        """
+        return self.iterate(
+            *args, seed=seed, length_offset=length_offset
+        )[0]
+
+    def run_replicates(
+            self, num_replicates, detailed_output=False, pool=None
+    ):
         """Perform several runs of the simulation in order to collect
         statistics on performance.
 
@@ -1630,6 +2288,11 @@ class Simulation():
             num_replicates (int): Number of replicates to run.
             detailed_output (bool): Whether to consolidate details about cast
                 and mana statistics in addition to DPS values. Defaults False.
+            pool (multiprocessing.Pool): Pool of worker processes to run the
+                replicates on. Since the Simulation state is shipped with the
+                replicates, one pool can be shared across several calls with
+                different player stats. Defaults to the pool shared by all
+                calls in this process.
 
         Returns:
             dps_vals (np.ndarray): Array containing average DPS of each run.
@@ -1655,48 +2318,85 @@ class Simulation():
         if detailed_output:
             oom_times = np.zeros(num_replicates)
 
-        # Create pool of workers to run replicates in parallel
-        pool = multiprocessing.Pool(processes=psutil.cpu_count(logical=False))
-        i = 0
+        # Run replicates in parallel on a pool of workers. The Simulation is
+        # pickled only once here and published in shared memory, and each
+        # worker unpickles it only once for all of the replicates it runs, so
+        # that only the fight length offsets travel with the replicates.
+        # Replicates are handed out in small
+        # chunks, leaving enough chunks in the queue that a slow worker does
+        # not hold up the others. Results are averaged, so the order in which
+        # they come back does not matter.
+        if pool is None:
+            pool = _get_worker_pool()
+
+        num_procs = _count_worker_processes()
+        chunksize = max(1, num_replicates // (8 * num_procs))
+
+        length_offsets = _draw_length_offsets(num_replicates)
+
+        with _shared_sim_state(self) as (batch_key, state_name):
+            run_replicate = functools.partial(
+                _run_replicate, batch_key, state_name, detailed_output
+            )
+
+            # If only DPS values are needed, then have the workers return
+            # just those rather than the full per-fight breakdowns.
+            if not detailed_output:
+                dps_vals[:] = np.fromiter(
+                    pool.imap_unordered(
+                        run_replicate, length_offsets, chunksize=chunksize
+                    ), dtype=float, count=num_replicates
+                )
+                return dps_vals
+
+            outputs = list(pool.imap_unordered(
+                run_replicate, length_offsets, chunksize=chunksize
+            ))
 
-        for output in pool.imap(self.iterate, range(num_replicates)):
+        # Collect the raw per-replicate breakdowns into arrays, and average
+        # them once all replicates have finished.
+        for i, output in enumerate(outputs):
             avg_dps, dmg_breakdown, aura_stats, time_to_oom = output
             dps_vals[i] = avg_dps
 
-            if not detailed_output:
-                i += 1
-                continue
-
-            # Consolidate damage breakdown for the fight
             if i == 0:
-                cast_sum = copy.deepcopy(dmg_breakdown)
-                aura_sum = copy.deepcopy(aura_stats)
-            else:
-                for ability in cast_sum:
-                    for key in cast_sum[ability]:
-                        val = dmg_breakdown[ability][key]
-                        cast_sum[ability][key] = (
-                            (cast_sum[ability][key] * i + val) / (i + 1)
-                        )
-                for row in range(len(aura_sum)):
-                    for col in [1, 2]:
-                        val = aura_stats[row][col]
-                        aura_sum[row][col] = (
-                            (aura_sum[row][col] * i + val) / (i + 1)
-                        )
+                cast_sum = collections.OrderedDict(
+                    (ability, dict(entry))
+                    for ability, entry in dmg_breakdown.items()
+                )
+                aura_sum = [list(row) for row in aura_stats]
+                cast_raw = {
+                    ability: {
+                        key: np.empty(num_replicates)
+                        for key in cast_sum[ability]
+                    } for ability in cast_sum
+                }
+                aura_raw = np.empty((len(aura_sum), num_replicates, 2))
+
+            for ability in cast_raw:
+                for key in cast_raw[ability]:
+                    cast_raw[ability][key][i] = dmg_breakdown[ability][key]
+            for row in range(len(aura_sum)):
+                aura_raw[row, i] = aura_stats[row][1:3]
 
             # Consolidate oom time
             oom_times[i] = time_to_oom
-            i += 1
 
-        pool.close()
+        # Consolidate damage breakdowns and aura statistics
+        for ability in cast_sum:
+            for key in cast_sum[ability]:
+                cast_sum[ability][key] = cast_raw[ability][key].mean()
+
+        aura_means = aura_raw.mean(axis=1)
 
-        if not detailed_output:
-            return dps_vals
+        for row in range(len(aura_sum)):
+            aura_sum[row][1:3] = aura_means[row].tolist()
 
         return dps_vals, cast_sum, aura_sum, oom_times
 
-    def calc_deriv(self, num_replicates, param, increment, base_dps):
+    def calc_deriv(
+            self, num_replicates, param, increment, base_dps, pool=None
+    ):
         """Calculate DPS increase after incrementing a player stat.
 
         Arguments:
@@ -1704,6 +2404,8 @@ class Simulation():
             param (str): Player attribute to increment.
             increment (float): Magnitude of stat increment.
             base_dps (float): Pre-calculated base DPS before stat increments.
+            pool (multiprocessing.Pool): Optional worker pool to run the
+                replicates on. Defaults to the shared pool for this process.
 
         Returns:
             dps_delta (float): Average DPS increase after the stat increment.
@@ -1711,73 +2413,89 @@ class Simulation():
                 the calculation is finished.
         """
         # Increment the stat
-        original_value = getattr(self.player, param)
-        setattr(self.player, param, original_value + increment)
+        original_value = self.increment_stat(param, increment)
+
+        # Calculate DPS
+        dps_vals = self.run_replicates(num_replicates, pool=pool)
+        avg_dps = np.mean(dps_vals)
+
+        # Reset the stat to original value
+        self.restore_stat(param, increment, original_value)
+
+        return avg_dps - base_dps
+
+    def increment_stat(self, param, increment):
+        """Increment a player stat for a stat weight calculation, along with
+        any other stats that depend on it.
+
+        Arguments:
+            param (str): Player attribute to increment.
+            increment (float): Magnitude of stat increment.
+
+        Returns:
+            original_value (float): Value of the Player attribute prior to
+                the increment, for use with restore_stat().
+        """
+        player = self.player
+        original_value = getattr(player, param)
+        setattr(player, param, original_value + increment)
 
         # For Expertise increments, implementation details demand we
         # update both 'miss_chance' and 'dodge_chance'
         if param == 'dodge_chance':
-            self.player.miss_chance += increment
+            player.miss_chance += increment
 
         # For Agility increments, also augment Attack Power and Crit
         if param == 'agility':
-            self.player.attack_power += self.player.ap_mod * increment
-            self.player.crit_chance += increment / 83.33 / 100.
+            player.attack_power += player.ap_mod * increment
+            player.crit_chance += increment * _CRIT_PER_AGILITY
 
-        # Calculate DPS
-        dps_vals = self.run_replicates(num_replicates)
-        avg_dps = np.mean(dps_vals)
+        return original_value
 
-        # Reset the stat to original value
-        setattr(self.player, param, original_value)
+    def restore_stat(self, param, increment, original_value):
+        """Undo a stat increment previously applied with increment_stat().
+
+        Arguments:
+            param (str): Player attribute that was incremented.
+            increment (float): Magnitude of the stat increment.
+            original_value (float): Value of the Player attribute prior to
+                the increment.
+        """
+        player = self.player
+        setattr(player, param, original_value)
 
         if param == 'dodge_chance':
-            self.player.miss_chance -= increment
+            player.miss_chance -= increment
 
         if param == 'agility':
-            self.player.attack_power -= self.player.ap_mod * increment
-            self.player.crit_chance -= increment / 83.33 / 100.
+            player.attack_power -= player.ap_mod * increment
+            player.crit_chance -= increment * _CRIT_PER_AGILITY
 
-        return avg_dps - base_dps
+    def calc_stat_increments(self, agi_mod=1.0):
+        """Determine the stat increments used for stat weight calculations.
 
-    def calc_stat_weights(
-            self, num_replicates, base_dps=None, agi_mod=1.0
-    ):
-        """Calculate performance derivatives for AP, hit, crit, and haste.
+        For all stats, we use a much larger increment than +1 in order to see
+        sufficient DPS increases above the simulation noise. The increase is
+        then linearized down to a +1 increment for weight calculation. This
+        approximation is accurate as long as DPS is linear in each stat up to
+        the larger increment that was used.
 
         Arguments:
-            num_replicates (int): Number of replicates to run.
-            base_dps (float): If provided, use a pre-calculated value for the
-                base DPS before stat increments. Defaults to calculating base
-                DPS from scratch.
             agi_mod (float): Multiplier for primary attributes to use for
                 determining Agility weight. Defaults to 1.0
 
         Returns:
-            dps_deltas (dict): Dictionary containing DPS increase from 1 AP,
-                1% hit, 1% expertise, 1% crit, 1% haste, 1 Agility, 1 Armor Pen
-                Rating, and 1 Weapon Damage.
-            stat_weights (dict): Dictionary containing normalized stat weights
-                for 1% hit, 1% expertise, 1% crit, 1% haste, 1 Agility, 1 Armor
-                Pen Rating, and 1 Weapon Damage relative to 1 AP.
+            stat_increments (list of tuples): (stat name, Player attribute,
+                increment, scale) entries, where the DPS increase after the
+                increment multiplied by the scale gives the stat value.
         """
-        # First store base DPS and deltas after each stat increment
-        dps_deltas = {}
-
-        if base_dps is None:
-            dps_vals = self.run_replicates(num_replicates)
-            base_dps = np.mean(dps_vals)
-
-        # For all stats, we will use a much larger increment than +1 in order
-        # to see sufficient DPS increases above the simulation noise. We will
-        # then linearize the increase down to a +1 increment for weight
-        # calculation. This approximation is accurate as long as DPS is linear
-        # in each stat up to the larger increment that was used.
+        player = self.player
+        stat_increments = []
 
         # For AP, we will use an increment of +80 AP. We also scale the
         # increase by a factor of 1.1 to account for HotW
-        dps_deltas['1 AP'] = 1.0/80.0 * self.calc_deriv(
-            num_replicates, 'attack_power', 80 * self.player.ap_mod, base_dps
+        stat_increments.append(
+            ('1 AP', 'attack_power', 80 * player.ap_mod, 1.0/80.0)
         )
 
         # For hit and crit, we will use an increment of 2%.
@@ -1785,53 +2503,181 @@ class Simulation():
         # For hit, we reduce miss chance by 2% if well below hit cap, and
         # increase miss chance by 2% when already capped or close.
         sign = 1 - 2 * int(
-            self.player.miss_chance - self.player.dodge_chance > 0.02
+            player.miss_chance - player.dodge_chance > 0.02
         )
-        dps_deltas['1% hit'] = -0.5 * sign * self.calc_deriv(
-            num_replicates, 'miss_chance', sign * 0.02, base_dps
+        stat_increments.append(
+            ('1% hit', 'miss_chance', sign * 0.02, -0.5 * sign)
         )
 
         # For expertise, we mimic hit, except with dodge.
-        sign = 1 - 2 * int(self.player.dodge_chance > 0.02)
-        dps_deltas['1% expertise'] = -0.5 * sign * self.calc_deriv(
-            num_replicates, 'dodge_chance', sign * 0.02, base_dps
+        sign = 1 - 2 * int(player.dodge_chance > 0.02)
+        stat_increments.append(
+            ('1% expertise', 'dodge_chance', sign * 0.02, -0.5 * sign)
         )
 
         # Crit is a simple increment
-        dps_deltas['1% crit'] = 0.5 * self.calc_deriv(
-            num_replicates, 'crit_chance', 0.02, base_dps
-        )
+        stat_increments.append(('1% crit', 'crit_chance', 0.02, 0.5))
 
         # For haste we will use an increment of 4%. (Note that this is 4% in
         # one slot and not four individual 1% buffs.) We implement the
         # increment by reducing the player swing timer.
         base_haste_rating = sim_utils.calc_haste_rating(
-            self.player.swing_timer, multiplier=self.haste_multiplier
+            player.swing_timer, multiplier=self.haste_multiplier
         )
-        swing_delta = self.player.swing_timer - sim_utils.calc_swing_timer(
+        swing_delta = player.swing_timer - sim_utils.calc_swing_timer(
             base_haste_rating + 100.84, multiplier=self.haste_multiplier
         )
-        dps_deltas['1% haste'] = 0.25 * self.calc_deriv(
-            num_replicates, 'swing_timer', -swing_delta, base_dps
+        stat_increments.append(
+            ('1% haste', 'swing_timer', -swing_delta, 0.25)
         )
 
         # Due to bearweaving, separate Agility weight calculation is needed
-        dps_deltas['1 Agility'] = 1.0/40.0 * self.calc_deriv(
-            num_replicates, 'agility', 40 * agi_mod, base_dps
+        stat_increments.append(
+            ('1 Agility', 'agility', 40 * agi_mod, 1.0/40.0)
         )
 
         # For armor pen, we use an increment of 50 Rating. Similar to hit,
         # the sign of the delta depends on if we're near the 1400 cap.
-        sign = 1 - 2 * int(self.player.armor_pen_rating > 1350)
-        dps_deltas['1 Armor Pen Rating'] = 1./50. * sign * self.calc_deriv(
-            num_replicates, 'armor_pen_rating', sign * 50, base_dps
-        )
+        sign = 1 - 2 * int(player.armor_pen_rating > 1350)
+        stat_increments.append((
+            '1 Armor Pen Rating', 'armor_pen_rating', sign * 50,
+            1./50. * sign
+        ))
 
         # For weapon damage, we use an increment of 12
-        dps_deltas['1 Weapon Damage'] = 1./12. * self.calc_deriv(
-            num_replicates, 'bonus_damage', 12, base_dps
+        stat_increments.append(
+            ('1 Weapon Damage', 'bonus_damage', 12, 1./12.)
         )
 
+        return stat_increments
+
+    def calc_stat_weights(
+            self, num_replicates, base_dps=None, agi_mod=1.0
+    ):
+        """Calculate performance derivatives for AP, hit, crit, and haste.
+
+        Arguments:
+            num_replicates (int): Number of replicates to run.
+            base_dps (float): If provided, use a pre-calculated value for the
+                base DPS before stat increments. Defaults to calculating base
+                DPS from scratch.
+            agi_mod (float): Multiplier for primary attributes to use for
+                determining Agility weight. Defaults to 1.0
+
+        Returns:
+            dps_deltas (dict): Dictionary containing DPS increase from 1 AP,
+                1% hit, 1% expertise, 1% crit, 1% haste, 1 Agility, 1 Armor Pen
+                Rating, and 1 Weapon Damage.
+            stat_weights (dict): Dictionary containing normalized stat weights
+                for 1% hit, 1% expertise, 1% crit, 1% haste, 1 Agility, 1 Armor
+                Pen Rating, and 1 Weapon Damage relative to 1 AP.
+        """
+        # Make sure damage and mana parameters are up to date
+        self.player.calc_damage_params(**self.params)
+        self.player.set_mana_regen()
+        stat_increments = self.calc_stat_increments(agi_mod=agi_mod)
+
+        # Rather than running the stat increments one after another, queue
+        # the replicates for the base stats and every increment as a single
+        # batch of jobs on the shared pool, so that workers are not left idle
+        # at the end of each increment. Each job is tagged with its stat
+        # index, and the results are sorted back into rows by that index.
+        stat_indices = list(range(len(stat_increments)))
+
+        if base_dps is None:
+            stat_indices.insert(0, None)
+
+        jobs = [
+            (stat_idx, length_offset) for stat_idx in stat_indices
+            for length_offset in _draw_length_offsets(num_replicates)
+        ]
+        num_procs = _count_worker_processes()
+        chunksize = max(1, len(jobs) // (8 * num_procs))
+        dps_sums = collections.defaultdict(float)
+
+        with _shared_sim_state(self) as (batch_key, state_name):
+            run_replicate = functools.partial(
+                _run_stat_replicate, batch_key, state_name, [
+                    (param, increment)
+                    for _, param, increment, _ in stat_increments
+                ]
+            )
+
+            for stat_idx, avg_dps in _get_worker_pool().imap_unordered(
+                run_replicate, jobs, chunksize=chunksize
+            ):
+                dps_sums[stat_idx] += avg_dps
+
+        # Store base DPS and deltas after each stat increment
+        if base_dps is None:
+            base_dps = dps_sums[None] / num_replicates
+
+        dps_deltas = {}
+
+        for stat_idx, (stat, _, _, scale) in enumerate(stat_increments):
+            dps_deltas[stat] = scale * (
+                dps_sums[stat_idx] / num_replicates - base_dps
+            )
+
+        # Calculate normalized stat weights
+        stat_weights = {}
+
+        for stat in dps_deltas:
+            if stat != '1 AP':
+                stat_weights[stat] = dps_deltas[stat] / dps_deltas['1 AP']
+
+        return dps_deltas, stat_weights
+
+    def calc_stat_weights_crn(self, num_replicates, agi_mod=1.0):
+        """Calculate the same performance derivatives as calc_stat_weights(),
+        but using common random numbers. Each replicate simulates the base
+        stats and every stat increment with the same random seed, so that
+        most of the simulation noise cancels out of the paired DPS
+        differences and far fewer replicates are needed for stable weights.
+        Replicate k uses seed k, so results are reproducible.
+
+        Arguments:
+            num_replicates (int): Number of replicates to run.
+            agi_mod (float): Multiplier for primary attributes to use for
+                determining Agility weight. Defaults to 1.0
+
+        Returns:
+            dps_deltas (dict): Dictionary containing DPS increase from 1 AP,
+                1% hit, 1% expertise, 1% crit, 1% haste, 1 Agility, 1 Armor Pen
+                Rating, and 1 Weapon Damage.
+            stat_weights (dict): Dictionary containing normalized stat weights
+                for 1% hit, 1% expertise, 1% crit, 1% haste, 1 Agility, 1 Armor
+                Pen Rating, and 1 Weapon Damage relative to 1 AP.
+        """
+        # Make sure damage and mana parameters are up to date
+        self.player.calc_damage_params(**self.params)
+        self.player.set_mana_regen()
+
+        stat_increments = self.calc_stat_increments(agi_mod=agi_mod)
+
+        # Run the paired replicates on the shared pool of workers
+        pool = _get_worker_pool()
+        num_procs = _count_worker_processes()
+        chunksize = max(1, num_replicates // (8 * num_procs))
+
+        with _shared_sim_state(self) as (batch_key, state_name):
+            run_replicate = functools.partial(
+                _run_paired_replicate, batch_key, state_name, [
+                    (param, increment)
+                    for _, param, increment, _ in stat_increments
+                ]
+            )
+            dps_vals = np.array(list(pool.imap_unordered(
+                run_replicate, range(num_replicates), chunksize=chunksize
+            )))
+
+        # Average the paired differences from the base DPS
+        paired_deltas = np.mean(dps_vals[:, 1:] - dps_vals[:, :1], axis=0)
+        dps_deltas = {}
+
+        for (stat, _, _, scale), delta in zip(stat_increments, paired_deltas):
+            dps_deltas[stat] = scale * delta
+
         # Calculate normalized stat weights
         stat_weights = {}
 